@@ -1,44 +1,43 @@
 # app_simulador_bin.py - versão comentada com relatórios e validações
 
 import streamlit as st
-import pandas as pd
-import sqlite3
 import os
-import io
-import time
-import datetime
-
-# --- Atualização das tabelas do banco SQLite a partir de arquivos CSV ---
-PASTA_CSV = "arquivos"
-ARQUIVOS_CSV = {
-    "info_tipo_bin": "info_tipo_bin.csv",
-    "info_posicao_bin": "info_posicao_bin.csv"
-}
-
-conn = sqlite3.connect("logistica.db")
-
-# Lê cada CSV, ajusta e grava no banco SQLite
-for tabela, nome_arquivo in ARQUIVOS_CSV.items():
-    caminho = os.path.join(PASTA_CSV, nome_arquivo)
-    if os.path.exists(caminho):
-        try:
-            df = pd.read_csv(caminho, sep=";", engine="python", encoding="latin1")
-            df.columns = [c.strip().replace(" ", "_") for c in df.columns]
-
-            # Ajuste específico para o volume da bin
-            if tabela == "info_tipo_bin" and "Volume_(L)" in df.columns:
-                df["Volume_(L)"] = df["Volume_(L)"].astype(str).str.replace(",", ".", regex=False)
-                df["Volume_(L)"] = pd.to_numeric(df["Volume_(L)"], errors="coerce").fillna(0)
+from functools import partial
+
+from simulador import carregar_referencia, chave_resultado, ler_ondas
+from simulador import exportacao, visualizacao
+from simulador.exportacao import tabela_erros
+from simulador.perfil import tabela_etapas, cronometrar_exportacao
+from simulador.tarefas import ExecutorSimulacoes, FilaCheia, STATUS_ERRO
+from simulador.alocacao import PRIORIDADES
+from simulador.ondas import conteudo_ondas, nomes_ondas
+from simulador import cenarios as cenarios_whatif
+
+PASTA_CACHE_RESULTADOS = os.path.join(".cache", "resultados")
+# Abas já lidas de cada arquivo (Parquet), para simular de novo sem reler o .xlsx
+PASTA_CACHE_ENTRADAS = os.path.join(".cache", "entradas")
+# Última simulação (detalhado + impressões digitais das linhas): a próxima recalcula só o que mudou
+PASTA_ESTADO = os.path.join(".cache", "ultima_simulacao")
+# Processos usados no cálculo particionado por produto (1 = processo único)
+WORKERS_SIMULACAO = int(os.environ.get("SIMULADOR_WORKERS", "1"))
+# Processos que leem os arquivos de uma simulação com várias ondas (vazio = um por CPU)
+WORKERS_LEITURA = int(os.environ["SIMULADOR_WORKERS_LEITURA"]) if os.environ.get("SIMULADOR_WORKERS_LEITURA") else None
+# Simulações executadas ao mesmo tempo em segundo plano e tamanho máximo da fila
+TAREFAS_SIMULTANEAS = int(os.environ.get("SIMULADOR_TAREFAS", "2"))
+LIMITE_FILA = int(os.environ.get("SIMULADOR_LIMITE_FILA", "8"))
+# Intervalo (s) entre as consultas da página à situação da simulação
+INTERVALO_ACOMPANHAMENTO = 1.0
+
+
+@st.cache_resource
+def executor_simulacoes():
+    # Um executor por processo do servidor, compartilhado por todas as sessões
+    return ExecutorSimulacoes(
+        workers=TAREFAS_SIMULTANEAS, limite_fila=LIMITE_FILA, pasta_resultados=PASTA_CACHE_RESULTADOS,
+        pasta_entradas=PASTA_CACHE_ENTRADAS, pasta_estado=PASTA_ESTADO, workers_calculo=WORKERS_SIMULACAO,
+        workers_leitura=WORKERS_LEITURA
+    )
 
-            df.to_sql(tabela, conn, if_exists="replace", index=False)
-            print(f"🔄 Atualizado: {tabela}")
-        except Exception as e:
-            print(f"❌ Erro ao processar {nome_arquivo}: {e}")
-    else:
-        print(f"⚠️ Arquivo não encontrado: {nome_arquivo}")
-
-conn.close()
-print("✅ Banco logistica.db atualizado com sucesso.")
 
 # --- Configurações visuais iniciais da página ---
 st.set_page_config(
@@ -59,371 +58,230 @@ st.markdown(
 )
 
 # --- Upload de arquivo do usuário ---
-if "simulando" not in st.session_state:
-    st.session_state["simulando"] = False
-
-arquivo = st.file_uploader("📂 Selecionar arquivo de simulação (.xlsx)", type=["xlsx"])
+# Simulações rodam em segundo plano; resultados ficam no cache compartilhado (memória + disco),
+# então reruns, downloads e outras abas reaproveitam sem recalcular
+executor = executor_simulacoes()
+cache_resultados = executor.resultados
+cache_entradas = executor.entradas
+
+# Vários arquivos (ondas do dia, com o mesmo info_posicao_produtos) são simulados como uma única base
+arquivos = st.file_uploader(
+    "📂 Selecionar arquivo(s) de simulação (.xlsx)", type=["xlsx"], accept_multiple_files=True,
+    help="Com mais de um arquivo, cada um é uma onda: as bases são simuladas juntas, com resumos por onda e consolidados."
+)
+entradas = [(a.name, a.getvalue()) for a in arquivos]
+if len(entradas) > 1:
+    st.caption(f"🌊 {len(entradas)} ondas: {', '.join(nomes_ondas([nome for nome, _ in entradas]))}")
+# Ordem em que a demanda de cada posição consome as bins disponíveis
+prioridade = st.selectbox("🚦 Prioridade de alocação nas posições", PRIORIDADES)
+# Bins pelas dimensões do item (colunas Comprimento, Largura, Altura e UM dimensão da base), e não só pelo volume
+encaixe_dimensoes = st.checkbox(
+    "📐 Encaixe por dimensões",
+    help="Produtos com Comprimento, Largura e Altura na base usam as unidades que cabem em cada tipo de bin (testando as orientações do item); os demais seguem pelo volume."
+)
 
-# Após selecionar, exibe botão para iniciar
-if arquivo and not st.session_state["simulando"]:
-    st.warning("⚠️ A simulação levará alguns minutos. Tempo médio estimado: 10 minutos a cada 200.000 linhas. Aguarde...")
+resultado = None
+tarefa = None
+if entradas:
+    referencia = carregar_referencia()
+    chave_arquivo = chave_resultado(conteudo_ondas(entradas), referencia.versao, prioridade, encaixe_dimensoes)
+    resultado = cache_resultados.obter(chave_arquivo)
+    if resultado is None:
+        tarefa = executor.tarefa_da_chave(chave_arquivo)
+
+# Simulação com erro: mostra as mensagens e permite tentar de novo
+if tarefa is not None and tarefa.status == STATUS_ERRO:
+    for erro in tarefa.erros:
+        st.error(erro)
+
+# Após selecionar, exibe botão para iniciar (resultados já calculados para os mesmos arquivos são reaproveitados)
+if entradas and resultado is None and (tarefa is None or not tarefa.ativa):
+    st.warning("⚠️ A simulação roda em segundo plano: é possível fechar a aba e voltar depois com os mesmos arquivos.")
     st.markdown("---")
     if st.button("▶️ Iniciar Simulação"):
-        st.session_state["simulando"] = True
-
-# --- Início da simulação ---
-if st.session_state["simulando"]:
-    try:
-        inicio_tempo = time.time()
-
-        # Lê planilhas do Excel
-        df_base = pd.read_excel(arquivo, sheet_name="base_item_pacotes")
-        df_posicoes_prod = pd.read_excel(arquivo, sheet_name="info_posicao_produtos")
-
-        total_linhas_base = len(df_base)
-        contador_sucesso = 0
-
-        # --- Validação de colunas obrigatórias ---
-        colunas_obrigatorias_base = ["Produto", "Qtd.solicitada total", "Recebedor mercadoria", "Peso", "UM peso", "Volume", "UM volume", "Área de atividade"]
-        colunas_obrigatorias_pos = ["Posição no depósito", "Tipo de depósito", "Área armazmto", "Produto"]
-
-        for col in colunas_obrigatorias_base:
-            if col not in df_base.columns:
-                st.error(f"Coluna obrigatória ausente na base_item_pacotes: {col}")
-                st.stop()
-
-        for col in colunas_obrigatorias_pos:
-            if col not in df_posicoes_prod.columns:
-                st.error(f"Coluna obrigatória ausente na info_posicao_produtos: {col}")
-                st.stop()
-
-        # --- Normalizações e ajustes na base ---
-        df_base["Recebedor mercadoria"] = df_base["Recebedor mercadoria"].astype(str).str.zfill(5)
-        df_base["Tipo_de_depósito"] = df_base["Área de atividade"].astype(str).str[:2].str.zfill(4)
-        df_base["Peso"] = pd.to_numeric(df_base["Peso"], errors="coerce").fillna(0)
-        df_base["Volume"] = pd.to_numeric(df_base["Volume"], errors="coerce").fillna(0)
-        df_base["Qtd.solicitada total"] = pd.to_numeric(df_base["Qtd.solicitada total"], errors="coerce").fillna(1)
-        df_base.loc[df_base["UM peso"] == "G", "Peso"] /= 1000
-        df_base.loc[df_base["UM volume"] == "ML", "Volume"] /= 1000
-        df_base["Volume unitário (L)"] = df_base["Volume"] / df_base["Qtd.solicitada total"]
-
-        # --- Leitura e renomeação das tabelas SQLite ---
-        conn = sqlite3.connect("logistica.db")
-        df_tipo_bin = pd.read_sql("SELECT * FROM info_tipo_bin", conn)
-        df_posicao_bin = pd.read_sql("SELECT * FROM info_posicao_bin", conn)
-        conn.close()
-
-        df_posicoes_prod = df_posicoes_prod.rename(columns={"Posição no depósito": "Posicao", "Tipo de depósito": "Tipo_de_depósito"})
-        df_posicao_bin = df_posicao_bin.rename(columns={"Posição_no_depósito": "Posicao", "Tipo_de_depósito": "Tipo_de_depósito", "Qtd._Caixas_BIN_ABASTECIMENTO": "Quantidade_Bin"})
-        df_tipo_bin = df_tipo_bin.rename(columns={"Tipo": "Tipo", "Volume_(L)": "Volume_max_L"})
-
-        # Normaliza textos e formatos
-        df_tipo_bin["Tipo"] = df_tipo_bin["Tipo"].astype(str).str.strip()
-        df_posicao_bin["Tipo"] = df_posicao_bin["Tipo"].astype(str).str.strip()
-        df_posicao_bin["Tipo_de_depósito"] = df_posicao_bin["Tipo_de_depósito"].astype(str).str.zfill(4).str.strip()
-        df_posicoes_prod["Tipo_de_depósito"] = df_posicoes_prod["Tipo_de_depósito"].astype(str).str.zfill(4).str.strip()
-        df_tipo_bin["Volume_max_L"] = pd.to_numeric(df_tipo_bin["Volume_max_L"], errors="coerce").fillna(0)
-
-        # --- Junta tabelas com base de posições ---
-        df_posicoes_prod = df_posicoes_prod.merge(df_posicao_bin, on=["Posicao", "Tipo_de_depósito"], how="left")
-        df_posicoes_prod = df_posicoes_prod.merge(df_tipo_bin, on="Tipo", how="left")
-
-        # --- Cálculo de bins por produto ---
-        resultado = []
-        for _, row in df_base.iterrows():
-            produto = row["Produto"]
-            estrutura = row["Tipo_de_depósito"]
-            loja = row["Recebedor mercadoria"]
-            volume_unitario = row["Volume unitário (L)"]
-            qtd = row["Qtd.solicitada total"]
-
-            posicoes = df_posicoes_prod[(df_posicoes_prod["Produto"] == produto) & (df_posicoes_prod["Tipo_de_depósito"] == estrutura)]
-
-            if posicoes.empty:
-                # Produto sem posição
-                resultado.append({
-                    "Produto": produto, "Recebedor": loja, "Estrutura": estrutura,
-                    "Posicao": "N/A", "Tipo_Bin": "N/A",
-                    "Bins_Necessarias": "Erro: Produto sem posição",
-                    "Bins_Disponiveis": "-", "Diferença": "-",
-                    "Quantidade_Total": "-", "Volume_Total": "-", "Volumetria_Máxima": "-"
-                })
-                continue
-
-            volume_total = volume_unitario * qtd
-            for _, pos in posicoes.iterrows():
-                posicao = pos.get("Posicao", "N/A")
-                tipo_bin = pos.get("Tipo", "N/A")
-                volume_max = pos.get("Volume_max_L", 1)
-
-                if pd.isna(volume_max) or volume_max <= 0:
-                    # Bin sem volume
-                    resultado.append({
-                        "Produto": produto, "Recebedor": loja, "Estrutura": estrutura,
-                        "Posicao": posicao, "Tipo_Bin": tipo_bin,
-                        "Bins_Necessarias": "Erro: Bin sem volume",
-                        "Bins_Disponiveis": pos.get("Quantidade_Bin", 0), "Diferença": "-",
-                        "Quantidade_Total": "-", "Volume_Total": "-", "Volumetria_Máxima": "-"
-                    })
-                    continue
-
-                bins_necessarias = int(-(-volume_total // volume_max))  # teto da divisão
-                bins_disponiveis = int(pos.get("Quantidade_Bin", 0))
-                diferenca = bins_disponiveis - bins_necessarias
-                quantidade_total = min(bins_necessarias * qtd, qtd)
-                volume_total_bins = quantidade_total * volume_unitario
-                volumetria_maxima = bins_disponiveis * volume_max
-
-                resultado.append({
-                    "Produto": produto, "Recebedor": loja, "Estrutura": estrutura,
-                    "Posicao": posicao, "Tipo_Bin": tipo_bin,
-                    "Bins_Necessarias": bins_necessarias,
-                    "Bins_Disponiveis": bins_disponiveis,
-                    "Diferença": diferenca,
-                    "Quantidade_Total": quantidade_total,
-                    "Volume_Total": round(volume_total_bins, 2),
-                    "Volumetria_Máxima": round(volumetria_maxima, 2)
-                })
-                contador_sucesso += 1
-
-        df_resultado = pd.DataFrame(resultado)
-
-        # --- Geração do relatório resumido agrupado ---
-        # Merge com descrição da estrutura
-        df_resumo = df_resultado.merge(
-            df_posicao_bin[["Posicao", "Tipo_de_depósito", "Estrutura"]].drop_duplicates(),
-            how="left",
-            left_on=["Posicao", "Estrutura"],
-            right_on=["Posicao", "Tipo_de_depósito"]
-        )
-
-        df_resumo = df_resumo.merge(
-            df_posicoes_prod[["Produto", "Descrição breve do produto"]].drop_duplicates(),
-            on="Produto", how="left"
-        )
-
-        # Seleção e renomeação das colunas
-        df_resumo = df_resumo[[ 
-            "Estrutura_x", "Estrutura_y", "Posicao", "Produto", "Descrição breve do produto",
-            "Tipo_Bin", "Bins_Necessarias", "Bins_Disponiveis", "Diferença",
-            "Quantidade_Total", "Volume_Total", "Volumetria_Máxima"
-        ]]
-
-        df_resumo.columns = [
-            "Estrutura", "Descrição - estrutura", "Posição", "Produto", "Descrição – produto",
-            "Tipo_Bin", "Bins_Necessarias", "Bins_Disponiveis", "Diferença",
-            "Quantidade Total", "Volume Total", "Volumetria Máxima"
-        ]
-        
-        # Separa erros e consolida os dados
-        df_erros_resumo = df_resumo[df_resumo["Bins_Necessarias"].astype(str).str.contains("Erro", na=False)]
-        df_ok_resumo = df_resumo[~df_resumo["Bins_Necessarias"].astype(str).str.contains("Erro", na=False)]
-
-        # Converte colunas numéricas antes de agrupar
-        colunas_numericas_ok = [
-            "Bins_Necessarias", "Bins_Disponiveis", "Quantidade Total",
-            "Volume Total", "Volumetria Máxima"
-        ]
-
-        # Cria uma cópia segura para conversões numéricas
-        df_ok_resumo_numerico = df_ok_resumo.copy()
-
-        for col in colunas_numericas_ok:
-            df_ok_resumo_numerico.loc[:, col] = pd.to_numeric(df_ok_resumo_numerico[col], errors="coerce").fillna(0)
-
-        df_ok_resumo_agrupado = df_ok_resumo_numerico.groupby([
-            "Estrutura", "Descrição - estrutura", "Posição", "Produto", "Descrição – produto", "Tipo_Bin"
-        ], as_index=False).agg({
-            "Bins_Necessarias": "sum",
-            "Bins_Disponiveis": "first",
-            "Quantidade Total": "sum",
-            "Volume Total": "sum",
-            "Volumetria Máxima": "sum"
-        })
-
-        # Arredondamento de colunas numéricas para exibição
-        # Garante que colunas estejam numéricas para subtração
-        df_ok_resumo_agrupado["Bins_Disponiveis"] = pd.to_numeric(df_ok_resumo_agrupado["Bins_Disponiveis"], errors="coerce").fillna(0)
-        df_ok_resumo_agrupado["Bins_Necessarias"] = pd.to_numeric(df_ok_resumo_agrupado["Bins_Necessarias"], errors="coerce").fillna(0)
-
-        # Arredondamento de colunas numéricas para exibição
-        df_ok_resumo_agrupado["Volume Total"] = pd.to_numeric(df_ok_resumo_agrupado["Volume Total"], errors="coerce").fillna(0).round(2)
-        df_ok_resumo_agrupado["Volumetria Máxima"] = pd.to_numeric(df_ok_resumo_agrupado["Volumetria Máxima"], errors="coerce").fillna(0).round(2)
-
-        # Subtração segura agora que tudo é numérico
-        df_ok_resumo_agrupado["Diferença"] = df_ok_resumo_agrupado["Bins_Disponiveis"] - df_ok_resumo_agrupado["Bins_Necessarias"]
-        df_resumo_agrupado = pd.concat([df_ok_resumo_agrupado, df_erros_resumo], ignore_index=True)
-
-        # Reorganiza as colunas para colocar "Diferença" ao lado de "Bins_Disponiveis"
-        colunas_ordenadas = [
-            "Estrutura", "Descrição - estrutura", "Posição", "Produto", "Descrição – produto", 
-            "Tipo_Bin", "Bins_Necessarias", "Bins_Disponiveis", "Diferença",
-            "Quantidade Total", "Volume Total", "Volumetria Máxima"
-        ]
-        df_ok_resumo_agrupado = df_ok_resumo_agrupado[colunas_ordenadas]
-
-        # --- Função para formatação brasileira de números ---
-        def formatar_valor(valor):
-            try:
-                if pd.isna(valor):
-                    return "-"
-                elif isinstance(valor, int):
-                    return f"{valor:,}".replace(",", ".")
-                else:
-                    return f"{valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-            except:
-                return valor
-
-
-        # --- Exibição e downloads ---
-        st.subheader("📊 Detalhado por Loja, Estrutura e Produto")
-
-        df_detalhado_formatado = df_resultado.copy()
-
-        for col in ["Bins_Necessarias", "Bins_Disponiveis", "Diferença", "Quantidade_Total", "Volume_Total", "Volumetria_Máxima"]:
-            df_detalhado_formatado[col] = df_detalhado_formatado[col].apply(formatar_valor)
-
-        st.dataframe(df_detalhado_formatado, use_container_width=True)
-
-        buffer = io.BytesIO()
-        with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
-            df_resultado.to_excel(writer, sheet_name="Detalhado Bins", index=False)
-
-        st.download_button("📥 Baixar Relatório Excel", data=buffer.getvalue(), file_name="Simulacao_Bins.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-        st.markdown("---")
+        try:
+            tarefa = executor.enviar_ondas(entradas, referencia, prioridade, encaixe_dimensoes)
+        except FilaCheia as e:
+            st.warning(f"⏳ {e}")
+
+# --- Acompanhamento da simulação (a página consulta a tarefa em intervalos, sem bloquear a sessão) ---
+if tarefa is not None and tarefa.ativa:
+    @st.fragment(run_every=INTERVALO_ACOMPANHAMENTO)
+    def acompanhar_simulacao(id_tarefa):
+        atual = executor.tarefa(id_tarefa)
+        if atual is None or not atual.ativa:
+            st.rerun()
+        st.progress(atual.progresso, text=f"{atual.status}: {atual.texto}")
+
+    acompanhar_simulacao(tarefa.id)
+
+# Simulações do servidor (de todas as sessões)
+tarefas = executor.tarefas()
+if tarefas:
+    with st.expander(f"🗂️ Simulações em segundo plano ({sum(t.ativa for t in tarefas)} em andamento)"):
+        st.dataframe([t.situacao() for t in tarefas], use_container_width=True, hide_index=True)
+
+# Linhas por página no detalhado
+TAMANHOS_PAGINA = [100, 500, 1000, 5000]
+
+
+# --- Exibição e downloads ---
+if resultado is not None:
+    df_resultado = resultado["tabelas"]["df_resultado"]
+    df_resumo_agrupado = resultado["tabelas"]["df_resumo_agrupado"]
+    resumo_nao_atendem = resultado["tabelas"]["resumo_nao_atendem"]
+    resumo_ok = resultado["tabelas"]["resumo_ok"]
+    resumo_geral = resultado["tabelas"]["resumo_geral"]
+    indicadores = resultado["indicadores"]
+
+    st.subheader("📊 Detalhado por Loja, Estrutura e Produto")
+
+    # Filtros e paginação no servidor: só a página visível é formatada e enviada ao navegador
+    colunas_filtro = ["Onda"] if "Onda" in df_resultado.columns else []
+    colunas_filtro += ["Estrutura", "Recebedor", "Status"]
+    filtros = {
+        coluna: col.multiselect(coluna, visualizacao.opcoes_filtro(df_resultado[coluna]))
+        for coluna, col in zip(colunas_filtro, st.columns(len(colunas_filtro)))
+    }
+    indices_filtrados = visualizacao.filtrar_indices(df_resultado, filtros)
+    # Linhas cuja demanda passa do que resta da posição, na ordem de alocação escolhida
+    somente_excedentes = st.checkbox("🚧 Somente linhas que excedem a capacidade da posição")
+    if somente_excedentes:
+        indices_filtrados = indices_filtrados[(df_resultado["Bins_Excedentes"].to_numpy(dtype=float, na_value=0) > 0)[indices_filtrados]]
+
+    col1, col2, col3 = st.columns([1, 1, 2])
+    tamanho_pagina = col1.selectbox("Linhas por página", TAMANHOS_PAGINA)
+    paginas = visualizacao.total_paginas(len(indices_filtrados), tamanho_pagina)
+    # A chave muda com os filtros, voltando à primeira página
+    numero_pagina = col2.number_input(
+        f"Página (de {paginas})", min_value=1, max_value=paginas, value=1,
+        key=f"pagina_detalhado_{hash(repr(filtros))}_{somente_excedentes}_{tamanho_pagina}"
+    )
+    inicio_pagina = (numero_pagina - 1) * tamanho_pagina
+    col3.caption(f"Linhas {min(inicio_pagina + 1, len(indices_filtrados))}–{min(inicio_pagina + tamanho_pagina, len(indices_filtrados))} de {len(indices_filtrados)} (total {len(df_resultado)})")
+
+    st.dataframe(visualizacao.pagina(df_resultado, indices_filtrados, numero_pagina, tamanho_pagina), use_container_width=True)
+
+    # Arquivos gerados apenas no clique (callable), sem rerun da página
+    st.download_button("📥 Baixar Relatório Excel", data=cronometrar_exportacao(partial(exportacao.excel, [("Detalhado Bins", df_resultado)]), "Simulacao_Bins.xlsx"), file_name="Simulacao_Bins.xlsx", mime=exportacao.MIME_XLSX, on_click="ignore")
+    st.markdown("---")
 
-        # --- Resumo por Produto e Estrutura ---
-        st.subheader("📊 Resumo por Produto e Estrutura")
-        
-        df_resumo_formatado = df_resumo_agrupado.copy()
-
-        for col in ["Bins_Necessarias", "Bins_Disponiveis", "Diferença", "Quantidade Total", "Volume Total", "Volumetria Máxima"]:
-            df_resumo_formatado[col] = df_resumo_formatado[col].apply(formatar_valor)
-
-        st.dataframe(df_resumo_formatado, use_container_width=True)
-
-        buffer_resumo = io.BytesIO()
-        with pd.ExcelWriter(buffer_resumo, engine="xlsxwriter") as writer:
-            df_resumo_agrupado.to_excel(writer, sheet_name="Resumo Produto Estrutura", index=False)
-
-        st.download_button("📥 Baixar Resumo Produto/Estrutura", data=buffer_resumo.getvalue(), file_name="Resumo_Produto_Estrutura.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-
-        # --- Resumo por posição: OK e Não Atende ---
-        df_validos = df_resumo[~df_resumo["Bins_Necessarias"].astype(str).str.contains("Erro", na=False)].copy()
-        df_validos["Bins_Necessarias"] = pd.to_numeric(df_validos["Bins_Necessarias"], errors="coerce").fillna(0)
-        df_validos["Bins_Disponiveis"] = pd.to_numeric(df_validos["Bins_Disponiveis"], errors="coerce").fillna(0)
-
-        df_posicoes_check = df_validos.groupby(["Posição", "Descrição - estrutura"], as_index=False).agg({
-            "Bins_Necessarias": "sum",
-            "Bins_Disponiveis": "first"
-        })
-        df_posicoes_check["Status"] = df_posicoes_check.apply(lambda x: "OK" if x["Bins_Disponiveis"] >= x["Bins_Necessarias"] else "Não Atende", axis=1)
-
-        df_nao_atendem = df_posicoes_check[df_posicoes_check["Status"] == "Não Atende"]
-        df_ok = df_posicoes_check[df_posicoes_check["Status"] == "OK"]
-
-        resumo_nao_atendem = df_nao_atendem.groupby("Descrição - estrutura")["Posição"].nunique().reset_index(name="Posições - Não Atendem")
-        resumo_ok = df_ok.groupby("Descrição - estrutura")["Posição"].nunique().reset_index(name="Posições - OK")
-
-        # Exibe resumos lado a lado
-        col1, col2 = st.columns(2)
-        with col1:
-            st.subheader("🚨 Resumo - Posições Não Atendem")
-            st.dataframe(resumo_nao_atendem)
-            st.write(f"**Total Geral: {resumo_nao_atendem['Posições - Não Atendem'].sum()} posições**")
-        with col2:
-            st.subheader("✅ Resumo - Posições OK")
-            st.dataframe(resumo_ok)
-            st.write(f"**Total Geral: {resumo_ok['Posições - OK'].sum()} posições**")
-
-        # Exibe tempo da simulação
-        tempo_total = time.time() - inicio_tempo
-        tempo_formatado = str(datetime.timedelta(seconds=int(tempo_total)))
-        st.markdown("---")
+    # --- Resumo por Produto e Estrutura ---
+    st.subheader("📊 Resumo por Produto e Estrutura")
 
-        # --- Exibe Resumo Geral da Simulação ---
-        st.subheader("📊 Resumo Geral da Simulação")
-
-        # Garante que todas as colunas necessárias estão no tipo numérico
-        colunas_numericas = [
-            "Bins_Necessarias", "Bins_Disponiveis", "Diferença",
-            "Quantidade Total", "Volume Total", "Volumetria Máxima"
-        ]
-
-        for col in colunas_numericas:
-            df_ok_resumo_agrupado[col] = pd.to_numeric(df_ok_resumo_agrupado[col], errors="coerce").fillna(0)
-
-        # Geração do resumo geral
-        resumo_geral = df_ok_resumo_agrupado.groupby("Descrição - estrutura", as_index=False).agg({
-            "Bins_Necessarias": "sum",
-            "Bins_Disponiveis": "sum",
-            "Diferença": "sum",
-            "Quantidade Total": "sum",
-            "Volume Total": "sum",
-            "Volumetria Máxima": "sum"
-        })
-
-        # Renomeia colunas para exibição
-        resumo_geral.columns = [
-            "Descrição - estrutura",
-            "Total Bins Necessárias",
-            "Total Bins Disponíveis",
-            "Total Diferença",
-            "Total Quantidade Total",
-            "Total Volume Total",
-            "Total Volumetria Máxima"
-        ]
-
-        resumo_geral_formatado = resumo_geral.copy()
-        colunas_formatar = [
-            "Total Bins Necessárias", "Total Bins Disponíveis", "Total Diferença",
-            "Total Quantidade Total", "Total Volume Total", "Total Volumetria Máxima"
-        ]
-
-        for col in colunas_formatar:
-            resumo_geral_formatado[col] = resumo_geral_formatado[col].apply(formatar_valor)
-
-        # Exibição formatada
-        st.dataframe(resumo_geral_formatado, use_container_width=True)
-
-
-        # Geração do Excel
-        buffer_geral = io.BytesIO()
-        with pd.ExcelWriter(buffer_geral, engine="xlsxwriter") as writer:
-            resumo_geral.to_excel(writer, sheet_name="Resumo Geral", index=False)
-
-        st.download_button(
-            label="📥 Baixar Resumo Geral",
-            data=buffer_geral.getvalue(),
-            file_name="Resumo_Geral_Simulacao.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-        )
-        st.markdown("---")
+    st.dataframe(visualizacao.formatar_br(df_resumo_agrupado), use_container_width=True)
+
+    st.download_button("📥 Baixar Resumo Produto/Estrutura", data=cronometrar_exportacao(partial(exportacao.excel, [("Resumo Produto Estrutura", df_resumo_agrupado)]), "Resumo_Produto_Estrutura.xlsx"), file_name="Resumo_Produto_Estrutura.xlsx", mime=exportacao.MIME_XLSX, on_click="ignore")
 
-        st.success("✅ Simulação concluída com sucesso!")
-        st.subheader("📊 Resumo de Linhas Processadas")
-        st.write(f"⏱️ Tempo total da simulação: **{tempo_formatado}**")
-        st.write(f"📄 Total de linhas da base: **{total_linhas_base}**")
-        st.write(f"✔️ Linhas simuladas sem erro: **{contador_sucesso}**")
-        st.write(f"❌ Linhas com erro: **{total_linhas_base - contador_sucesso}**")
+    # Exibe resumos lado a lado
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("🚨 Resumo - Posições Não Atendem")
+        st.dataframe(resumo_nao_atendem)
+        st.write(f"**Total Geral: {resumo_nao_atendem['Posições - Não Atendem'].sum()} posições**")
+    with col2:
+        st.subheader("✅ Resumo - Posições OK")
+        st.dataframe(resumo_ok)
+        st.write(f"**Total Geral: {resumo_ok['Posições - OK'].sum()} posições**")
+
+    st.markdown("---")
+
+    # --- Resumo por Onda (os demais resumos são os consolidados de todas as ondas) ---
+    if "resumo_ondas" in resultado["tabelas"]:
+        st.subheader("🌊 Resumo por Onda")
+        st.caption("Posições OK / Não Atendem com a demanda de cada onda; as bins excedentes consideram as ondas anteriores na mesma posição.")
+        resumo_ondas = resultado["tabelas"]["resumo_ondas"]
+        st.dataframe(visualizacao.formatar_br(resumo_ondas), use_container_width=True, hide_index=True)
+        st.download_button("📥 Baixar Resumo por Onda", data=cronometrar_exportacao(partial(exportacao.excel, [("Resumo por Onda", resumo_ondas)]), "Resumo_Ondas.xlsx"), file_name="Resumo_Ondas.xlsx", mime=exportacao.MIME_XLSX, on_click="ignore")
         st.markdown("---")
 
-        # Exibe erros, se houver
-        st.subheader("🚨 Resumo de Erros")
-        df_erros = df_resultado[df_resultado["Bins_Necessarias"].astype(str).str.contains("Erro")]
-        if not df_erros.empty:
-            st.dataframe(df_erros)
-            buffer_erros = io.BytesIO()
-            with pd.ExcelWriter(buffer_erros, engine="xlsxwriter") as writer:
-                df_erros.to_excel(writer, sheet_name="Erros", index=False)
-            st.download_button("📥 Baixar Erros", data=buffer_erros.getvalue(), file_name="Erros_Simulacao.xlsx", mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-        else:
-            st.info("✅ Nenhum erro encontrado na simulação.")
-
-    except Exception as e:
-        st.error(f"Erro no processamento: {e}")
-    finally:
-        st.session_state["simulando"] = False
+    # --- Exibe Resumo Geral da Simulação ---
+    st.subheader("📊 Resumo Geral da Simulação")
+
+    # Exibição formatada
+    st.dataframe(visualizacao.formatar_br(resumo_geral), use_container_width=True)
+
+
+    st.download_button(
+        label="📥 Baixar Resumo Geral",
+        data=cronometrar_exportacao(partial(exportacao.excel, [("Resumo Geral", resumo_geral)]), "Resumo_Geral_Simulacao.xlsx"),
+        file_name="Resumo_Geral_Simulacao.xlsx",
+        mime=exportacao.MIME_XLSX,
+        on_click="ignore"
+    )
+    st.markdown("---")
+
+    # --- Exportações completas ---
+    st.subheader("📦 Exportações")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.download_button("📥 Todos os relatórios (Excel)", data=cronometrar_exportacao(partial(exportacao.excel_combinado, resultado), "Simulacao_Bins_Completa.xlsx"), file_name="Simulacao_Bins_Completa.xlsx", mime=exportacao.MIME_XLSX, on_click="ignore")
+    with col2:
+        st.download_button("📥 Detalhado (CSV.gz)", data=cronometrar_exportacao(partial(exportacao.csv_gz, df_resultado), "Simulacao_Bins.csv.gz"), file_name="Simulacao_Bins.csv.gz", mime=exportacao.MIME_CSV_GZ, on_click="ignore")
+    with col3:
+        st.download_button("📥 Detalhado (Parquet)", data=cronometrar_exportacao(partial(exportacao.parquet, df_resultado), "Simulacao_Bins.parquet"), file_name="Simulacao_Bins.parquet", mime=exportacao.MIME_PARQUET, on_click="ignore")
+    st.markdown("---")
+
+    total_linhas_base = indicadores["total_linhas_base"]
+    contador_sucesso = indicadores["contador_sucesso"]
+
+    st.success("✅ Simulação concluída com sucesso!")
+    st.subheader("📊 Resumo de Linhas Processadas")
+    st.write(f"⏱️ Tempo total da simulação: **{indicadores['tempo_formatado']}**")
+    st.write(f"📄 Total de linhas da base: **{total_linhas_base}**")
+    st.write(f"✔️ Linhas simuladas sem erro: **{contador_sucesso}**")
+    st.write(f"❌ Linhas com erro: **{total_linhas_base - contador_sucesso}**")
+    excedentes = df_resultado["Bins_Excedentes"]
+    st.write(f"🚧 Linhas que excedem a capacidade da posição: **{int((excedentes > 0).sum())}** ({int(excedentes.sum())} bins excedentes)")
+    if "linhas_recalculadas" in indicadores:
+        st.write(f"♻️ Linhas recalculadas (novas ou alteradas desde a última simulação): **{indicadores['linhas_recalculadas']}**")
+
+    # Tempo, vazão e pico de memória de cada etapa
+    if indicadores.get("etapas"):
+        with st.expander("⏱️ Tempo por etapa"):
+            st.dataframe(tabela_etapas(indicadores["etapas"]), use_container_width=True, hide_index=True)
+    st.markdown("---")
+
+    # Exibe erros, se houver
+    st.subheader("🚨 Resumo de Erros")
+    df_erros = tabela_erros(df_resultado)
+    if not df_erros.empty:
+        st.dataframe(visualizacao.formatar_br(df_erros.head(1000)), use_container_width=True)
+        if len(df_erros) > 1000:
+            st.caption(f"Exibindo 1000 de {len(df_erros)} linhas com erro; a lista completa está no download.")
+        st.download_button("📥 Baixar Erros", data=cronometrar_exportacao(partial(exportacao.excel, [("Erros", df_erros)]), "Erros_Simulacao.xlsx"), file_name="Erros_Simulacao.xlsx", mime=exportacao.MIME_XLSX, on_click="ignore")
+    else:
+        st.info("✅ Nenhum erro encontrado na simulação.")
+    st.markdown("---")
+
+    # --- Cenários (what-if): volume por tipo de bin, demanda e bins extras por estrutura ---
+    st.subheader("🧪 Cenários (what-if)")
+    st.caption("Células vazias mantêm o valor atual. Todos os cenários são calculados juntos, sobre o mesmo cruzamento base × posições.")
+    tipos_bin = referencia.df_tipo_bin["Tipo"].tolist()
+    estruturas = sorted(set(resumo_ok["Descrição - estrutura"]) | set(resumo_nao_atendem["Descrição - estrutura"]))
+    tabela_cenarios, tabela_bins = cenarios_whatif.tabelas_cenarios(tipos_bin)
+
+    tabela_cenarios = st.data_editor(tabela_cenarios, num_rows="dynamic", hide_index=True, key="editor_cenarios", use_container_width=True)
+    tabela_bins = st.data_editor(
+        tabela_bins, num_rows="dynamic", hide_index=True, key="editor_bins_cenarios",
+        column_config={cenarios_whatif.COLUNA_ESTRUTURA: st.column_config.SelectboxColumn(options=estruturas)}
+    )
+
+    if st.button("🧪 Comparar cenários"):
+        try:
+            lista_cenarios = cenarios_whatif.montar_cenarios(tabela_cenarios, tabela_bins, tipos_bin)
+            # As abas lidas vêm do cache de entradas, sem reler o .xlsx
+            df_base, df_posicoes_prod = ler_ondas(entradas, cache=cache_entradas)
+            comparacao = cenarios_whatif.simular_cenarios(df_base, df_posicoes_prod, lista_cenarios, referencia)
+            st.session_state["comparacao_cenarios"] = (chave_arquivo, comparacao)
+        except Exception as e:
+            st.error(f"Erro nos cenários: {e}")
+
+    comparacao_salva = st.session_state.get("comparacao_cenarios")
+    if comparacao_salva and comparacao_salva[0] == chave_arquivo:
+        comparacao = comparacao_salva[1]
+        st.dataframe(comparacao, use_container_width=True, hide_index=True)
+        st.download_button("📥 Baixar Comparação de Cenários", data=cronometrar_exportacao(partial(exportacao.excel, [("Cenários", comparacao)]), "Comparacao_Cenarios.xlsx"), file_name="Comparacao_Cenarios.xlsx", mime=exportacao.MIME_XLSX, on_click="ignore")
 
 # --- Rodapé com créditos do autor ---
 st.markdown("---")
@@ -1,31 +1,34 @@
-# atualiza_sqlite.py
-
-import pandas as pd
-import sqlite3
-import os
-
-# Pasta com os arquivos CSV
-PASTA_CSV = "arquivos"
-ARQUIVOS_CSV = {
-    "info_tipo_bin": "info_tipo_bin.csv",
-    "info_posicao_bin": "info_posicao_bin.csv"
-}
-
-# Conecta ao banco SQLite
-conn = sqlite3.connect("logistica.db")
-
-for tabela, nome_arquivo in ARQUIVOS_CSV.items():
-    caminho = os.path.join(PASTA_CSV, nome_arquivo)
-    if os.path.exists(caminho):
-        print(f"🔄 Atualizando: {tabela}")
-        try:
-            df = pd.read_csv(caminho, sep=";|,", engine="python", encoding="latin1")
-            df.columns = [c.strip().replace(" ", "_") for c in df.columns]  # Normaliza nomes de coluna
-            df.to_sql(tabela, conn, if_exists="replace", index=False)
-        except Exception as e:
-            print(f"❌ Erro ao processar {nome_arquivo}: {e}")
-    else:
-        print(f"⚠️ Arquivo não encontrado: {nome_arquivo}")
-
-conn.close()
-print("✅ Banco logistica.db atualizado com sucesso.")
+# atualiza_sqlite.py - sincroniza o logistica.db com os CSVs da pasta "arquivos"
+#
+# Uso:
+#   python atualiza_sqlite.py
+#   python atualiza_sqlite.py --banco logistica.db --pasta arquivos
+#
+# Apenas as linhas inseridas, alteradas ou removidas desde a última execução são
+# gravadas (hash por linha), numa única transação; a versão das referências é
+# incrementada quando há alterações, invalidando os caches de resultado.
+
+import argparse
+import sys
+
+from simulador.referencia import sincronizar_banco, CAMINHO_BANCO, PASTA_CSV
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulador de Bins - sincronização das tabelas de referência")
+    parser.add_argument("--banco", default=CAMINHO_BANCO, help=f"Banco SQLite (padrão: {CAMINHO_BANCO})")
+    parser.add_argument("--pasta", default=PASTA_CSV, help=f"Pasta com os CSVs (padrão: {PASTA_CSV})")
+    args = parser.parse_args(argv)
+
+    versao, alteracoes = sincronizar_banco(args.banco, args.pasta)
+    if not alteracoes:
+        print(f"✅ Nenhuma alteração nos CSVs (versão {versao}).")
+        return 0
+
+    inseridas, atualizadas, removidas = (sum(c[i] for c in alteracoes.values()) for i in range(3))
+    print(f"✅ Banco {args.banco} sincronizado: {inseridas} inseridas, {atualizadas} atualizadas, {removidas} removidas (versão {versao}).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+# benchmark_simulador.py - benchmark da simulação com dados sintéticos
+#
+# Uso:
+#   python benchmark_simulador.py                                   # 10k a 2M linhas
+#   python benchmark_simulador.py --tamanhos 10000 200000 --gravar-baseline
+#   python benchmark_simulador.py --tamanhos 10000 200000 --tolerancia 0.3
+#
+# Para cada tamanho gera um arquivo determinístico (simulador/dados_sinteticos.py),
+# num processo novo, e mede separadamente leitura do Excel, cálculo, agregação e
+# exportação, além do pico de memória (RSS) de cada etapa e do processo.
+# O resultado vai para benchmarks/resultado.json e é comparado com
+# benchmarks/baseline.json; o retorno é 1 se alguma fase ficar mais lenta que
+# a tolerância. Acima do limite de linhas do Excel a leitura e a exportação
+# em .xlsx não são medidas.
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from simulador import carregar_referencia, simular, ler_planilha, PerfilExecucao, ETAPAS_SIMULACAO
+from simulador import exportacao
+from simulador.dados_sinteticos import gerar_entrada, gravar_planilha, LIMITE_LINHAS_EXCEL
+from simulador.perfil import pico_memoria_rss
+
+TAMANHOS_PADRAO = [10_000, 50_000, 200_000, 1_000_000, 2_000_000]
+CAMINHO_RESULTADO = os.path.join("benchmarks", "resultado.json")
+CAMINHO_BASELINE = os.path.join("benchmarks", "baseline.json")
+
+# Fase do benchmark -> etapas cronometradas que a compõem
+FASES = {
+    "ingestao": ["Leitura do Excel"],
+    # Todas as etapas da simulação antes dos resumos (novas etapas entram no cálculo)
+    "calculo": [etapa for etapa in ETAPAS_SIMULACAO if etapa != "Resumos"],
+    "agregacao": ["Resumos"],
+    "exportacao": ["Exportação Excel", "Exportação CSV.gz", "Exportação Parquet"]
+}
+
+
+def medir_tamanho(linhas, semente=0, workers=1):
+    """Executa todas as fases para um tamanho de base; roda num processo próprio."""
+    referencia = carregar_referencia()
+    perfil = PerfilExecucao()
+    pasta = tempfile.mkdtemp(prefix="benchmark_simulador_")
+    try:
+        with perfil.etapa("Geração sintética", linhas):
+            df_base, df_posicoes_prod = gerar_entrada(linhas, semente)
+
+        if linhas <= LIMITE_LINHAS_EXCEL:
+            caminho = os.path.join(pasta, "entrada.xlsx")
+            with perfil.etapa("Gravação da entrada", linhas):
+                gravar_planilha(df_base, df_posicoes_prod, caminho)
+            del df_base, df_posicoes_prod
+            with perfil.etapa("Leitura do Excel", linhas):
+                df_base, df_posicoes_prod = ler_planilha(caminho)
+
+        resultado = simular(df_base, df_posicoes_prod, referencia, workers=workers, perfil=perfil)
+        df_resultado = resultado["tabelas"]["df_resultado"]
+
+        if len(df_resultado) <= LIMITE_LINHAS_EXCEL:
+            with perfil.etapa("Exportação Excel", len(df_resultado)):
+                exportacao.gravar_excel(os.path.join(pasta, "relatorios.xlsx"), exportacao.abas_relatorio(resultado))
+        with perfil.etapa("Exportação CSV.gz", len(df_resultado)):
+            exportacao.csv_gz(df_resultado)
+        with perfil.etapa("Exportação Parquet", len(df_resultado)):
+            exportacao.parquet(df_resultado)
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
+
+    segundos = {e["etapa"]: e["segundos"] for e in perfil.etapas}
+    pico = pico_memoria_rss()
+    return {
+        "linhas": linhas,
+        "linhas_resultado": len(df_resultado),
+        "fases": {
+            fase: round(sum(segundos[e] for e in etapas if e in segundos), 4) if any(e in segundos for e in etapas) else None
+            for fase, etapas in FASES.items()
+        },
+        "pico_rss_mb": round(pico / 1024 ** 2, 1) if pico is not None else None,
+        "etapas": perfil.etapas
+    }
+
+
+def comparar(resultados, baseline, tolerancia):
+    """Lista de (linhas, fase, segundos atuais, segundos da baseline, razão, regrediu)."""
+    anteriores = {r["linhas"]: r for r in baseline.get("resultados", [])}
+    comparacao = []
+    for r in resultados:
+        anterior = anteriores.get(r["linhas"])
+        if anterior is None:
+            continue
+        for fase, segundos in r["fases"].items():
+            base = anterior["fases"].get(fase)
+            if segundos is None or not base:
+                continue
+            razao = segundos / base
+            comparacao.append((r["linhas"], fase, segundos, base, razao, razao > 1 + tolerancia))
+    return comparacao
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulador de Bins - benchmark com dados sintéticos")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=TAMANHOS_PADRAO, help="Quantidades de linhas da base")
+    parser.add_argument("--semente", type=int, default=0, help="Semente do gerador sintético")
+    parser.add_argument("--workers", type=int, default=1, help="Processos do cálculo particionado por produto")
+    parser.add_argument("--saida", default=CAMINHO_RESULTADO, help=f"Arquivo JSON de resultado (padrão: {CAMINHO_RESULTADO})")
+    parser.add_argument("--baseline", default=CAMINHO_BASELINE, help=f"Baseline para comparação (padrão: {CAMINHO_BASELINE})")
+    parser.add_argument("--gravar-baseline", action="store_true", help="Grava o resultado também como nova baseline")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="Aumento de tempo tolerado por fase antes de acusar regressão (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    # Atualiza o banco antes de abrir os processos (eles apenas leem)
+    carregar_referencia()
+
+    resultados = []
+    for linhas in args.tamanhos:
+        # Um processo por tamanho, para que o pico de RSS de um não contamine o seguinte
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            r = pool.submit(medir_tamanho, linhas, args.semente, args.workers).result()
+        resultados.append(r)
+        fases = ", ".join(f"{fase} {s:.2f}s" for fase, s in r["fases"].items() if s is not None)
+        print(f"✅ {linhas} linhas: {fases}, pico {r['pico_rss_mb']} MB")
+
+    registro = {
+        "data": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "semente": args.semente,
+        "workers": args.workers,
+        "resultados": resultados
+    }
+    os.makedirs(os.path.dirname(args.saida) or ".", exist_ok=True)
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump(registro, f, ensure_ascii=False, indent=2)
+    print(f"📄 Resultado gravado em {args.saida}")
+
+    regressoes = 0
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"📊 Comparação com {args.baseline} ({baseline.get('data')}):")
+        for linhas, fase, segundos, base, razao, regrediu in comparar(resultados, baseline, args.tolerancia):
+            regressoes += regrediu
+            print(f"{'❌' if regrediu else '✔️'} {linhas:>9} {fase:<11} {segundos:8.2f}s  baseline {base:8.2f}s  ({razao:.2f}x)")
+    else:
+        print(f"⚠️ Baseline {args.baseline} não encontrada; nada a comparar.")
+
+    if args.gravar_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        shutil.copyfile(args.saida, args.baseline)
+        print(f"📌 Baseline atualizada: {args.baseline}")
+
+    return 1 if regressoes else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,14 @@
+# simulador - núcleo de cálculo do Simulador de Bins, separado da página Streamlit
+
+from simulador.motor import calcular_bins, ERRO_SEM_POSICAO, ERRO_BIN_SEM_VOLUME, ERRO_NAO_CABE, COLUNAS_RESULTADO
+from simulador.referencia import carregar_referencia, atualizar_banco, sincronizar_banco, Referencia
+from simulador.cache_resultados import CacheResultados, chave_resultado
+from simulador.simulacao import simular, colunas_ausentes, ETAPAS_SIMULACAO
+from simulador.leitura import ler_planilha, PlanilhaInvalida
+from simulador.particionamento import calcular_bins_particionado
+from simulador.perfil import PerfilExecucao
+from simulador.cenarios import Cenario, simular_cenarios
+from simulador.incremental import simular_incremental, ETAPAS_INCREMENTAL
+from simulador.alocacao import alocar, PRIORIDADES
+from simulador.encaixe import tabela_encaixe, dimensoes_produto, TabelaEncaixe
+from simulador.ondas import ler_ondas, combinar_ondas
@@ -0,0 +1,78 @@
+# simulador/alocacao.py - alocação da capacidade de cada posição entre as linhas
+#
+# Cada linha OK é comparada, isoladamente, com todas as bins da posição; aqui a
+# demanda de cada posição (Posição + Tipo de depósito) é ordenada por uma
+# prioridade configurável e consumida em sequência. O consumo acumulado sai de
+# uma única ordenação (lexsort) e de uma soma acumulada por grupo em NumPy, sem
+# laços por posição, e marca quais linhas passam da capacidade e em quantas bins.
+
+import numpy as np
+import pandas as pd
+
+from simulador.motor import STATUS_OK, anulavel
+
+PRIORIDADE_ONDA = "Ordem da onda"
+PRIORIDADE_LOJA = "Loja"
+PRIORIDADE_QUANTIDADE = "Maior quantidade de bins"
+PRIORIDADES = [PRIORIDADE_ONDA, PRIORIDADE_LOJA, PRIORIDADE_QUANTIDADE]
+
+# Colunas acrescentadas ao detalhado por alocar()
+COLUNAS_ALOCACAO = ["Consumo_Acumulado", "Bins_Excedentes"]
+
+
+def _codigos(serie):
+    # Códigos inteiros na ordem dos valores (categorias do resultado já vêm ordenadas)
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.cat.codes.to_numpy(dtype=np.int64)
+    return pd.factorize(serie, sort=True)[0].astype(np.int64)
+
+
+def chave_prioridade(df_resultado, prioridade):
+    """Chave de ordenação da demanda dentro de cada posição (menor = atendida antes).
+
+    Empates (e a prioridade "Ordem da onda") seguem a ordem das linhas no detalhado.
+    """
+    if prioridade == PRIORIDADE_ONDA:
+        return np.zeros(len(df_resultado), dtype=np.int64)
+    if prioridade == PRIORIDADE_LOJA:
+        return _codigos(df_resultado["Recebedor"])
+    if prioridade == PRIORIDADE_QUANTIDADE:
+        return -df_resultado["Bins_Necessarias"].to_numpy(dtype=np.int64, na_value=0)
+    raise ValueError(f"Prioridade de alocação desconhecida: {prioridade} (use {', '.join(PRIORIDADES)})")
+
+
+def alocar(df_resultado, prioridade=PRIORIDADE_ONDA):
+    """Acrescenta ao detalhado o consumo acumulado da posição e as bins excedentes de cada linha.
+
+    "Consumo_Acumulado": bins da posição consumidas até a linha (inclusive), na ordem de
+    `prioridade`; "Bins_Excedentes": bins da linha que não cabem no que resta da posição
+    (0 se couber). Linhas com erro ficam vazias. Altera e retorna `df_resultado`.
+    """
+    ok = (df_resultado["Status"] == STATUS_OK).to_numpy()
+    linhas = np.flatnonzero(ok)
+
+    # --- Posição de cada linha OK e ordem de atendimento dentro dela ---
+    posicao = _codigos(df_resultado["Posicao"])[linhas]
+    estrutura = _codigos(df_resultado["Estrutura"])[linhas]
+    grupo = posicao * (estrutura.max(initial=0) + 1) + estrutura
+    chave = chave_prioridade(df_resultado, prioridade)[linhas]
+    ordem = np.lexsort((linhas, chave, grupo))
+
+    # --- Soma acumulada por posição: soma global menos o total antes do início do grupo ---
+    necessarias = df_resultado["Bins_Necessarias"].to_numpy(dtype=np.int64, na_value=0)[linhas][ordem]
+    disponiveis = df_resultado["Bins_Disponiveis"].to_numpy(dtype=np.int64, na_value=0)[linhas][ordem]
+    grupo = grupo[ordem]
+    acumulado = np.cumsum(necessarias)
+    inicio_grupo = np.r_[True, grupo[1:] != grupo[:-1]]
+    primeira = np.maximum.accumulate(np.where(inicio_grupo, np.arange(len(grupo)), 0))
+    consumo = acumulado - (acumulado - necessarias)[primeira]
+    excedentes = np.clip(consumo - disponiveis, 0, necessarias)
+
+    # --- De volta à ordem do detalhado ---
+    consumo_linha = np.zeros(len(df_resultado), dtype=np.int64)
+    excedentes_linha = np.zeros(len(df_resultado), dtype=np.int64)
+    consumo_linha[linhas[ordem]] = consumo
+    excedentes_linha[linhas[ordem]] = excedentes
+    for coluna, valores in zip(COLUNAS_ALOCACAO, (consumo_linha, excedentes_linha)):
+        df_resultado[coluna] = anulavel(valores, ok)
+    return df_resultado
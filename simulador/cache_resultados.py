@@ -0,0 +1,149 @@
+# simulador/cache_resultados.py - cache LRU dos resultados de simulação
+#
+# A chave combina o hash do arquivo enviado com a versão das tabelas de
+# referência. Os resultados ficam na memória do processo (o cache é um só,
+# compartilhado pelas sessões da página) e, se houver uma pasta configurada,
+# também em disco como Parquet (um diretório por chave).
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+LIMITE_MEMORIA_BYTES = 512 * 1024 ** 2
+LIMITE_DISCO_BYTES = 2 * 1024 ** 3
+
+logger = logging.getLogger(__name__)
+
+# Incrementar quando o formato das tabelas do resultado mudar (invalida o cache em disco)
+VERSAO_FORMATO = 4
+
+
+def chave_resultado(conteudo, versao_referencia, *parametros):
+    """Chave do cache: hash do conteúdo do arquivo enviado + versão das referências e do formato
+    (+ parâmetros da simulação que mudam o resultado, como a prioridade de alocação)."""
+    h = hashlib.sha256(conteudo)
+    h.update(":".join(map(str, (versao_referencia, VERSAO_FORMATO) + parametros)).encode())
+    return h.hexdigest()
+
+
+def _tamanho(resultado):
+    return int(sum(df.memory_usage(index=True, deep=True).sum() for df in resultado["tabelas"].values()))
+
+
+class CacheResultados:
+    """Cache LRU limitado por tamanho; `resultado` é um dict com "tabelas" (DataFrames) e "indicadores"."""
+
+    def __init__(self, limite_bytes=LIMITE_MEMORIA_BYTES, pasta=None, limite_disco_bytes=LIMITE_DISCO_BYTES):
+        self.limite_bytes = limite_bytes
+        self.pasta = pasta
+        self.limite_disco_bytes = limite_disco_bytes
+        self._itens = OrderedDict()
+        self._tamanhos = {}
+        self._trava = threading.Lock()
+        self._travas_disco = {}
+
+    def obter(self, chave):
+        with self._trava:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                return self._itens[chave]
+
+        resultado = self._ler_disco(chave)
+        if resultado is not None:
+            self._guardar_memoria(chave, resultado)
+        return resultado
+
+    def guardar(self, chave, resultado):
+        self._guardar_memoria(chave, resultado)
+        self._gravar_disco(chave, resultado)
+
+    def __contains__(self, chave):
+        return chave in self._itens
+
+    def __len__(self):
+        return len(self._itens)
+
+    # --- Memória ---
+    def _guardar_memoria(self, chave, resultado):
+        tamanho = _tamanho(resultado)
+        with self._trava:
+            self._itens[chave] = resultado
+            self._itens.move_to_end(chave)
+            self._tamanhos[chave] = tamanho
+            # Remove os menos usados, mantendo sempre o item mais recente
+            while len(self._itens) > 1 and sum(self._tamanhos.values()) > self.limite_bytes:
+                antiga, _ = self._itens.popitem(last=False)
+                del self._tamanhos[antiga]
+
+    # --- Disco (Parquet) ---
+    def _ler_disco(self, chave):
+        if not self.pasta:
+            return None
+        pasta_item = os.path.join(self.pasta, chave)
+        caminho_indicadores = os.path.join(pasta_item, "indicadores.json")
+        if not os.path.exists(caminho_indicadores):
+            return None
+        try:
+            with open(caminho_indicadores, encoding="utf-8") as f:
+                meta = json.load(f)
+            tabelas = {nome: pd.read_parquet(os.path.join(pasta_item, f"{nome}.parquet")) for nome in meta["tabelas"]}
+        except Exception as e:
+            logger.warning("Cache em disco ignorado (%s): %s", chave[:12], e)
+            return None
+        os.utime(caminho_indicadores)  # marca como usado recentemente
+        return {"tabelas": tabelas, "indicadores": meta["indicadores"]}
+
+    def _trava_disco(self, chave):
+        # Uma trava por chave: gravações simultâneas da mesma chave (threads do executor) em fila
+        with self._trava:
+            return self._travas_disco.setdefault(chave, threading.Lock())
+
+    def _gravar_disco(self, chave, resultado):
+        if not self.pasta:
+            return
+        os.makedirs(self.pasta, exist_ok=True)
+        pasta_item = os.path.join(self.pasta, chave)
+        with self._trava_disco(chave):
+            # Pasta temporária própria de cada gravação, trocada pela do item só quando completa
+            temporaria = tempfile.mkdtemp(prefix=f"{chave}.", suffix=".tmp", dir=self.pasta)
+            try:
+                for nome, df in resultado["tabelas"].items():
+                    df.to_parquet(os.path.join(temporaria, f"{nome}.parquet"), index=False)
+                # indicadores.json por último: sua presença marca o item como completo
+                with open(os.path.join(temporaria, "indicadores.json"), "w", encoding="utf-8") as f:
+                    json.dump({"tabelas": list(resultado["tabelas"]), "indicadores": resultado["indicadores"]}, f, default=str)
+                shutil.rmtree(pasta_item, ignore_errors=True)
+                os.replace(temporaria, pasta_item)
+            except Exception as e:
+                # Sem pyarrow ou colunas com tipos mistos: fica apenas em memória
+                shutil.rmtree(temporaria, ignore_errors=True)
+                logger.warning("Resultado %s mantido apenas em memória: %s", chave[:12], e)
+                return
+        self._limpar_disco()
+
+    def _limpar_disco(self):
+        itens = []
+        for nome in os.listdir(self.pasta):
+            if nome.endswith(".tmp"):
+                continue  # gravação em andamento
+            pasta_item = os.path.join(self.pasta, nome)
+            caminho_indicadores = os.path.join(pasta_item, "indicadores.json")
+            if not os.path.exists(caminho_indicadores):
+                continue
+            tamanho = sum(e.stat().st_size for e in os.scandir(pasta_item) if e.is_file())
+            itens.append((os.stat(caminho_indicadores).st_mtime, tamanho, pasta_item))
+
+        itens.sort()
+        total = sum(t for _, t, _ in itens)
+        for _, tamanho, pasta_item in itens[:-1]:
+            if total <= self.limite_disco_bytes:
+                break
+            shutil.rmtree(pasta_item, ignore_errors=True)
+            total -= tamanho
@@ -0,0 +1,174 @@
+# simulador/cenarios.py - simulação de cenários (what-if) sobre um único join
+#
+# Cada cenário altera o volume das bins por Tipo, multiplica as quantidades
+# solicitadas e soma bins às posições de cada Estrutura. O join base × posições
+# é feito uma vez; as bins necessárias de todos os cenários saem de contas em
+# matrizes (linhas × cenários), e o resultado compara, por Estrutura, quantas
+# posições atendem ("OK") ou não ("Não Atende") em cada cenário, com a mesma
+# regra do resumo de posições da simulação.
+
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from simulador.motor import juntar_base_posicoes
+from simulador.referencia import carregar_referencia
+from simulador.simulacao import colunas_ausentes, preparar_base, preparar_posicoes
+
+CENARIO_ATUAL = "Atual"
+
+
+class Cenario(NamedTuple):
+    """Alterações de um cenário; None ou vazio mantém o valor atual.
+
+    `volume_por_tipo`: {Tipo: Volume_max_L}; `multiplicador_quantidade`: fator sobre
+    "Qtd.solicitada total"; `bins_por_estrutura`: {Estrutura: bins a somar em cada posição}.
+    """
+    nome: str
+    volume_por_tipo: dict = None
+    multiplicador_quantidade: float = 1.0
+    bins_por_estrutura: dict = None
+
+
+class JuncaoCenarios(NamedTuple):
+    """Linhas do join com posição, em arrays, prontas para avaliar cenários."""
+    volume_unitario: np.ndarray
+    quantidade: np.ndarray
+    volume_max: np.ndarray
+    tipo: np.ndarray            # código do Tipo em `tipos` (-1 sem tipo)
+    tipos: pd.Index
+    grupo: np.ndarray           # código da posição (Posição + Estrutura) em `grupos_estrutura`
+    grupos_estrutura: np.ndarray  # Estrutura de cada posição
+    bins_posicao: np.ndarray    # bins disponíveis de cada posição (primeira ocorrência)
+
+
+def preparar_cenarios(df_base, df_posicoes_prod):
+    """Monta o join uma única vez a partir da base e das posições já preparadas."""
+    df = juntar_base_posicoes(df_base, df_posicoes_prod)
+    df = df[df["_ordem_pos"].notna()]
+    ordem_pos = df["_ordem_pos"].to_numpy(dtype=np.int64)
+
+    estrutura = df_posicoes_prod["Estrutura"].to_numpy(dtype=object)[ordem_pos]
+    # Posições sem Estrutura ficam fora do resumo de posições, como na simulação
+    com_estrutura = pd.notna(estrutura)
+    df, estrutura = df[com_estrutura], estrutura[com_estrutura]
+
+    tipo, tipos = pd.factorize(df["Tipo_Bin"].to_numpy(dtype=object))
+    grupo, grupos = pd.factorize(pd.MultiIndex.from_arrays([df["Posicao"].to_numpy(dtype=object), estrutura]))
+    primeira = np.unique(grupo, return_index=True)[1]
+    qtd_bin = pd.to_numeric(df["_qtd_bin"], errors="coerce").to_numpy(dtype=float)
+
+    return JuncaoCenarios(
+        volume_unitario=df["_volume_unitario"].to_numpy(dtype=float),
+        quantidade=df["_qtd"].to_numpy(dtype=float),
+        volume_max=df["_volume_max"].to_numpy(dtype=float),
+        tipo=tipo,
+        tipos=pd.Index(tipos),
+        grupo=grupo,
+        grupos_estrutura=grupos.get_level_values(1).to_numpy(dtype=object),
+        bins_posicao=np.trunc(np.nan_to_num(qtd_bin[primeira]))
+    )
+
+
+def avaliar_cenarios(juncao, cenarios):
+    """Compara, por Estrutura, as posições OK e Não Atende em cada cenário (tabela lado a lado)."""
+    nomes = [c.nome for c in cenarios]
+    if len(set(nomes)) != len(nomes):
+        raise ValueError("Os nomes dos cenários devem ser únicos")
+
+    # --- Parâmetros por cenário (colunas) ---
+    volumes = np.full((len(juncao.tipos) + 1, len(cenarios)), np.nan)  # última linha: sem tipo
+    multiplicadores = np.ones(len(cenarios))
+    estruturas = pd.Index(pd.unique(juncao.grupos_estrutura))
+    deltas = np.zeros((len(estruturas), len(cenarios)))
+    for j, cenario in enumerate(cenarios):
+        for tipo, volume in (cenario.volume_por_tipo or {}).items():
+            if tipo in juncao.tipos:
+                volumes[juncao.tipos.get_loc(tipo), j] = volume
+        multiplicadores[j] = 1.0 if cenario.multiplicador_quantidade is None else cenario.multiplicador_quantidade
+        for estrutura, delta in (cenario.bins_por_estrutura or {}).items():
+            if estrutura in estruturas:
+                deltas[estruturas.get_loc(estrutura), j] = delta
+
+    # --- Linhas × cenários ---
+    volume_max = volumes[juncao.tipo]
+    volume_max = np.where(np.isnan(volume_max), juncao.volume_max[:, None], volume_max)
+    ok = volume_max > 0
+    volume_total = (juncao.volume_unitario * juncao.quantidade)[:, None] * multiplicadores
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bins_necessarias = np.where(ok, -(-volume_total // np.where(ok, volume_max, 1.0)), 0)
+    if not np.isfinite(bins_necessarias).all():
+        raise ValueError("Volume total inválido (verifique linhas com Qtd.solicitada total igual a zero)")
+
+    # --- Posições × cenários: soma das bins necessárias das linhas OK ---
+    necessarias = pd.DataFrame(bins_necessarias).groupby(juncao.grupo).sum().to_numpy()
+    com_linha_ok = pd.DataFrame(ok).groupby(juncao.grupo).any().to_numpy()
+    estrutura_posicao = estruturas.get_indexer(juncao.grupos_estrutura)
+    disponiveis = np.maximum(juncao.bins_posicao[:, None] + deltas[estrutura_posicao], 0)
+    atende = disponiveis >= necessarias
+
+    # --- Estrutura × cenários ---
+    comparacao = pd.DataFrame({"Descrição - estrutura": estruturas})
+    for j, nome in enumerate(nomes):
+        contagem_ok = np.bincount(estrutura_posicao, weights=com_linha_ok[:, j] & atende[:, j], minlength=len(estruturas))
+        contagem_nao = np.bincount(estrutura_posicao, weights=com_linha_ok[:, j] & ~atende[:, j], minlength=len(estruturas))
+        comparacao[f"{nome} - OK"] = contagem_ok.astype(np.int64)
+        comparacao[f"{nome} - Não Atende"] = contagem_nao.astype(np.int64)
+    return comparacao.sort_values("Descrição - estrutura", ignore_index=True)
+
+
+def simular_cenarios(df_base, df_posicoes_prod, cenarios, referencia=None, incluir_atual=True):
+    """Avalia os cenários a partir das duas abas do arquivo (DataFrames brutos).
+
+    Com `incluir_atual` a primeira coluna de comparação é o cenário sem alterações.
+    Levanta ValueError se faltarem colunas obrigatórias.
+    """
+    erros = colunas_ausentes(df_base, df_posicoes_prod)
+    if erros:
+        raise ValueError("; ".join(erros))
+    if referencia is None:
+        referencia = carregar_referencia()
+
+    juncao = preparar_cenarios(preparar_base(df_base), preparar_posicoes(df_posicoes_prod, referencia))
+    if incluir_atual:
+        cenarios = [Cenario(CENARIO_ATUAL)] + list(cenarios)
+    return avaliar_cenarios(juncao, cenarios)
+
+
+# --- Edição dos cenários em tabelas (página) ---
+COLUNA_CENARIO = "Cenário"
+COLUNA_MULTIPLICADOR = "Multiplicador de quantidade"
+COLUNA_ESTRUTURA = "Estrutura"
+COLUNA_BINS = "Bins a mais por posição"
+
+
+def coluna_volume(tipo):
+    return f"Volume {tipo} (L)"
+
+
+def tabelas_cenarios(tipos):
+    """Tabelas vazias para edição: cenários (nome, multiplicador, volume por Tipo) e bins por Estrutura."""
+    df_cenarios = pd.DataFrame({COLUNA_CENARIO: ["Cenário 1"], COLUNA_MULTIPLICADOR: [1.0], **{coluna_volume(t): [np.nan] for t in tipos}})
+    df_bins = pd.DataFrame({COLUNA_CENARIO: pd.Series(dtype=object), COLUNA_ESTRUTURA: pd.Series(dtype=object), COLUNA_BINS: pd.Series(dtype="Int64")})
+    return df_cenarios, df_bins
+
+
+def montar_cenarios(df_cenarios, df_bins, tipos):
+    """Lista de Cenario a partir das tabelas editadas (células vazias mantêm o valor atual)."""
+    cenarios = []
+    for _, linha in df_cenarios.iterrows():
+        nome = linha[COLUNA_CENARIO]
+        if pd.isna(nome) or not str(nome).strip():
+            continue
+        nome = str(nome).strip()
+        volumes = {t: float(linha[coluna_volume(t)]) for t in tipos if pd.notna(linha.get(coluna_volume(t)))}
+        multiplicador = linha[COLUNA_MULTIPLICADOR]
+        bins = df_bins[df_bins[COLUNA_CENARIO].astype(str).str.strip() == nome].dropna(subset=[COLUNA_ESTRUTURA, COLUNA_BINS])
+        cenarios.append(Cenario(
+            nome,
+            volume_por_tipo=volumes,
+            multiplicador_quantidade=1.0 if pd.isna(multiplicador) else float(multiplicador),
+            bins_por_estrutura=dict(zip(bins[COLUNA_ESTRUTURA], bins[COLUNA_BINS].astype(int)))
+        ))
+    return cenarios
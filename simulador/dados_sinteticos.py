@@ -0,0 +1,85 @@
+# simulador/dados_sinteticos.py - gerador determinístico de arquivos de simulação
+#
+# Monta as abas base_item_pacotes e info_posicao_produtos a partir do layout
+# real de posições (arquivos/info_posicao_bin.csv): produtos com popularidade
+# desigual, lojas, unidades G/KG e ML/L misturadas e uma fração de produtos sem
+# posição mapeada. A mesma semente gera sempre o mesmo arquivo; usado pelo
+# benchmark_simulador.py.
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from simulador.exportacao import gravar_excel
+from simulador.referencia import PASTA_CSV, ARQUIVOS_CSV
+from simulador.simulacao import ABA_BASE, ABA_POSICOES
+
+# Maior quantidade de linhas de dados numa aba do Excel (1.048.576 com o cabeçalho)
+LIMITE_LINHAS_EXCEL = 1_048_575
+
+
+def _posicoes_reais(pasta_csv):
+    df = pd.read_csv(os.path.join(pasta_csv, ARQUIVOS_CSV["info_posicao_bin"]), sep=";", encoding="latin1", dtype=str)
+    return df.iloc[:, :2].set_axis(["Posição no depósito", "Tipo de depósito"], axis=1).dropna()
+
+
+def gerar_entrada(linhas, semente=0, produtos=None, lojas=400, fracao_sem_posicao=0.03, pasta_csv=PASTA_CSV):
+    """Gera (df_base, df_posicoes_prod) com as colunas do arquivo de simulação.
+
+    `produtos` é a quantidade de produtos mapeados (padrão: proporcional ao tamanho da base,
+    limitada às posições disponíveis); `fracao_sem_posicao` das linhas usa produtos sem posição.
+    """
+    rng = np.random.default_rng(semente)
+    posicoes = _posicoes_reais(pasta_csv)
+
+    # --- Aba info_posicao_produtos: cada produto ocupa de 1 a 3 posições reais ---
+    if produtos is None:
+        produtos = min(max(linhas // 20, 500), len(posicoes) // 2)
+    codigos = rng.choice(np.arange(100_000, 900_000), produtos, replace=False)
+    posicoes_por_produto = rng.choice([1, 2, 3], produtos, p=[0.7, 0.2, 0.1])
+    produto_posicao = np.repeat(codigos, posicoes_por_produto)[:len(posicoes)]
+    sorteio = rng.choice(len(posicoes), len(produto_posicao), replace=False)
+
+    df_posicoes_prod = pd.DataFrame({
+        "Posição no depósito": posicoes["Posição no depósito"].to_numpy()[sorteio],
+        "Tipo de depósito": posicoes["Tipo de depósito"].to_numpy()[sorteio],
+        "Área armazmto": "PICK",
+        "Produto": produto_posicao,
+        "Descrição breve do produto": [f"PRODUTO SINTETICO {p}" for p in produto_posicao]
+    })
+
+    # --- Aba base_item_pacotes: popularidade de Zipf entre as posições dos produtos ---
+    pesos = 1.0 / np.arange(1, len(df_posicoes_prod) + 1) ** 0.8
+    rng.shuffle(pesos)
+    indice = rng.choice(len(df_posicoes_prod), linhas, p=pesos / pesos.sum())
+    produto = df_posicoes_prod["Produto"].to_numpy()[indice].copy()
+    tipo_deposito = df_posicoes_prod["Tipo de depósito"].to_numpy()[indice].astype(int)
+
+    sem_posicao = rng.random(linhas) < fracao_sem_posicao
+    produto[sem_posicao] = rng.integers(900_000, 1_000_000, sem_posicao.sum())
+
+    quantidade = rng.geometric(0.15, linhas).astype(float)
+    volume_unitario_l = np.round(rng.lognormal(-0.5, 1.0, linhas), 3)
+    peso_unitario_kg = np.round(volume_unitario_l * rng.uniform(0.2, 1.5, linhas), 3)
+
+    em_gramas = rng.random(linhas) < 0.6
+    em_ml = rng.random(linhas) < 0.6
+    df_base = pd.DataFrame({
+        "Produto": produto,
+        "Qtd.solicitada total": quantidade,
+        "Recebedor mercadoria": rng.integers(1, lojas + 1, linhas),
+        "Peso": np.round(peso_unitario_kg * quantidade * np.where(em_gramas, 1000, 1), 3),
+        "UM peso": np.where(em_gramas, "G", "KG"),
+        "Volume": np.round(volume_unitario_l * quantidade * np.where(em_ml, 1000, 1), 3),
+        "UM volume": np.where(em_ml, "ML", "L"),
+        "Área de atividade": [f"{t}{c:02d}" for t, c in zip(tipo_deposito, rng.integers(1, 20, linhas))]
+    })
+    return df_base, df_posicoes_prod
+
+
+def gravar_planilha(df_base, df_posicoes_prod, destino):
+    """Grava as duas abas num .xlsx de entrada (limitado a LIMITE_LINHAS_EXCEL linhas por aba)."""
+    if len(df_base) > LIMITE_LINHAS_EXCEL:
+        raise ValueError(f"A aba {ABA_BASE} excede o limite de {LIMITE_LINHAS_EXCEL} linhas do Excel")
+    gravar_excel(destino, [(ABA_BASE, df_base), (ABA_POSICOES, df_posicoes_prod)])
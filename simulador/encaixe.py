@@ -0,0 +1,121 @@
+# simulador/encaixe.py - encaixe das unidades nas bins pelas dimensões (modo opcional)
+#
+# A regra padrão divide o volume total da linha pelo volume da bin, o que aceita
+# itens compridos ou volumosos que fisicamente não entram. No modo de encaixe as
+# dimensões do item (colunas opcionais da base) são comparadas com as da bin
+# (Comprimento/Largura/Altura em cm do info_tipo_bin): em cada uma das 6
+# orientações cabem floor(C/c)·floor(L/l)·floor(A/a) unidades, e vale a maior.
+#
+# As unidades por bin são calculadas uma única vez por (Produto, Tipo de bin),
+# numa tabela guardada em cache no processo; o cálculo de cada linha fica uma
+# consulta nessa tabela seguida de uma divisão, em colunas inteiras.
+
+import hashlib
+import itertools
+import threading
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+# Colunas opcionais da base com as dimensões de uma unidade do produto
+COLUNAS_DIMENSAO = ["Comprimento", "Largura", "Altura"]
+COLUNA_UM_DIMENSAO = "UM dimensão"
+COLUNAS_OPCIONAIS_BASE = COLUNAS_DIMENSAO + [COLUNA_UM_DIMENSAO]
+# Fator para centímetros de cada unidade de medida (sem unidade: cm)
+FATORES_CM = {"MM": 0.1, "CM": 1.0, "M": 100.0}
+
+# Dimensões das bins no info_tipo_bin (cm)
+COLUNAS_DIMENSAO_BIN = ["Comprimento_(cm)", "Largura_(cm)", "Altura_(cm)"]
+
+# Tabelas de encaixe mantidas no cache do processo
+TABELAS_GUARDADAS = 8
+
+_trava = threading.Lock()
+_cache = {}
+
+
+class TabelaEncaixe(NamedTuple):
+    """Unidades que cabem numa bin, por produto (linhas) e tipo de bin (colunas)."""
+    produtos: pd.Index
+    tipos: pd.Index
+    unidades: np.ndarray
+
+    def consultar(self, produto, tipo):
+        """Unidades por bin de cada par (produto, tipo); NaN se o produto ou a bin não tiver dimensões."""
+        if not self.unidades.size:
+            # Base sem dimensões (ou bins sem medidas): todas as linhas seguem pelo volume
+            return np.full(len(produto), np.nan)
+        i = self.produtos.get_indexer(np.asarray(produto, dtype=object))
+        j = self.tipos.get_indexer(np.asarray(tipo, dtype=object))
+        encontrada = (i >= 0) & (j >= 0)
+        return np.where(encontrada, self.unidades[np.maximum(i, 0), np.maximum(j, 0)], np.nan)
+
+
+def dimensoes_produto(df_base):
+    """Dimensões em cm (Comprimento, Largura, Altura) de cada produto, indexadas pelo Produto.
+
+    Vale a primeira linha do produto com as três dimensões positivas; sem as colunas
+    opcionais na base, retorna uma tabela vazia (todas as linhas seguem pelo volume).
+    """
+    if not all(col in df_base.columns for col in COLUNAS_DIMENSAO):
+        return pd.DataFrame(columns=COLUNAS_DIMENSAO, dtype=float)
+
+    dimensoes = pd.DataFrame({col: pd.to_numeric(df_base[col], errors="coerce") for col in COLUNAS_DIMENSAO})
+    if COLUNA_UM_DIMENSAO in df_base.columns:
+        unidade = df_base[COLUNA_UM_DIMENSAO].astype(object).where(df_base[COLUNA_UM_DIMENSAO].notna(), "CM")
+        fator = pd.Series(unidade.astype(str).str.strip().str.upper().to_numpy()).map(FATORES_CM).to_numpy(dtype=float)
+        dimensoes = dimensoes.mul(fator, axis=0)  # unidade desconhecida: NaN, linha descartada
+
+    dimensoes["Produto"] = df_base["Produto"].to_numpy()
+    validas = (dimensoes[COLUNAS_DIMENSAO] > 0).all(axis=1) & dimensoes["Produto"].notna()
+    return dimensoes[validas.to_numpy()].drop_duplicates("Produto").set_index("Produto")
+
+
+def unidades_por_bin(dimensoes_item, dimensoes_bin):
+    """Matriz (itens × bins) com o maior número de unidades por bin entre as 6 orientações do item."""
+    item = np.asarray(dimensoes_item, dtype=float)[:, None, :]
+    bins = np.asarray(dimensoes_bin, dtype=float)[None, :, :]
+    unidades = np.zeros((item.shape[0], bins.shape[1]), dtype=np.int64)
+    for orientacao in itertools.permutations(range(3)):
+        cabem = np.floor(bins / item[:, :, list(orientacao)]).prod(axis=2)
+        unidades = np.maximum(unidades, cabem.astype(np.int64))
+    return unidades
+
+
+def assinatura_bins(df_tipo_bin):
+    """Hash das dimensões dos tipos de bin (muda quando o info_tipo_bin altera alguma medida)."""
+    hashes = pd.util.hash_pandas_object(df_tipo_bin[["Tipo"] + COLUNAS_DIMENSAO_BIN], index=False).to_numpy()
+    return hashlib.sha256(hashes.tobytes()).hexdigest()[:16]
+
+
+def _chave(dimensoes, df_tipo_bin):
+    h = hashlib.sha256(assinatura_bins(df_tipo_bin).encode())
+    h.update(pd.util.hash_pandas_object(dimensoes, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def tabela_encaixe(dimensoes, df_tipo_bin):
+    """TabelaEncaixe dos produtos de `dimensoes` (ver dimensoes_produto) nos tipos de bin com dimensões.
+
+    Guardada no cache do processo pela hash das dimensões dos produtos e das bins:
+    simular de novo a mesma base não recalcula o encaixe.
+    """
+    chave = _chave(dimensoes, df_tipo_bin)
+    with _trava:
+        tabela = _cache.get(chave)
+    if tabela is not None:
+        return tabela
+
+    medidas_bin = df_tipo_bin[COLUNAS_DIMENSAO_BIN].apply(pd.to_numeric, errors="coerce")
+    com_medidas = (medidas_bin > 0).all(axis=1).to_numpy()
+    tabela = TabelaEncaixe(
+        produtos=pd.Index(dimensoes.index.to_numpy(dtype=object)),
+        tipos=pd.Index(df_tipo_bin["Tipo"].to_numpy(dtype=object)[com_medidas]),
+        unidades=unidades_por_bin(dimensoes[COLUNAS_DIMENSAO].to_numpy(), medidas_bin.to_numpy()[com_medidas])
+    )
+    with _trava:
+        if len(_cache) >= TABELAS_GUARDADAS:
+            _cache.pop(next(iter(_cache)))
+        _cache[chave] = tabela
+    return tabela
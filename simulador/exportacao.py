@@ -0,0 +1,117 @@
+# simulador/exportacao.py - gravação dos relatórios da simulação
+#
+# O resultado é tipado (números anuláveis + "Status" categórico); os textos de
+# erro ("Erro: Produto sem posição", "-") só são montados aqui, na exportação
+# ou exibição.
+#
+# Os arquivos são gerados sob demanda. O Excel usa o modo constant_memory do
+# xlsxwriter e recebe as linhas em blocos do resultado, sem materializar uma
+# segunda cópia formatada da tabela inteira.
+
+import io
+
+import pandas as pd
+import xlsxwriter
+
+from simulador.motor import STATUS_OK, STATUS_SEM_POSICAO, STATUS_BIN_SEM_VOLUME, STATUS_NAO_CABE, ERRO_SEM_POSICAO, ERRO_BIN_SEM_VOLUME, ERRO_NAO_CABE
+
+MIME_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+MIME_CSV_GZ = "application/gzip"
+MIME_PARQUET = "application/vnd.apache.parquet"
+
+# Linhas renderizadas por vez ao escrever o Excel
+TAMANHO_BLOCO = 20_000
+
+# Tabela do resultado -> nome da aba no Excel
+ABAS_RELATORIO = {
+    "df_resultado": "Detalhado Bins",
+    "df_resumo_agrupado": "Resumo Produto Estrutura",
+    "resumo_nao_atendem": "Posições Não Atendem",
+    "resumo_ok": "Posições OK",
+    "resumo_geral": "Resumo Geral",
+    "resumo_ondas": "Resumo por Onda",
+    "df_erros": "Erros"
+}
+
+TEXTOS_ERRO = {STATUS_SEM_POSICAO: ERRO_SEM_POSICAO, STATUS_BIN_SEM_VOLUME: ERRO_BIN_SEM_VOLUME, STATUS_NAO_CABE: ERRO_NAO_CABE}
+
+
+def tabela_erros(df_resultado):
+    return df_resultado[(df_resultado["Status"] != STATUS_OK).to_numpy()]
+
+
+def tabelas_relatorio(resultado):
+    """Todas as tabelas exportáveis do resultado, incluindo a de erros."""
+    tabelas = dict(resultado["tabelas"])
+    tabelas["df_erros"] = tabela_erros(tabelas["df_resultado"])
+    return tabelas
+
+
+def abas_relatorio(resultado):
+    """(nome da aba, DataFrame) de todos os relatórios do resultado (o resumo por onda só existe com várias ondas)."""
+    tabelas = tabelas_relatorio(resultado)
+    return [(aba, tabelas[nome]) for nome, aba in ABAS_RELATORIO.items() if nome in tabelas]
+
+
+def renderizar(df, coluna_erro="Bins_Necessarias"):
+    """Versão legível de uma tabela com "Status": texto do erro em `coluna_erro` e "-" nos números ausentes."""
+    if "Status" not in df.columns:
+        return df
+
+    status = df["Status"]
+    df = df.drop(columns="Status")
+    for col in df.columns:
+        if pd.api.types.is_numeric_dtype(df[col]) and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            valores = df[col].astype(object)
+            df[col] = valores.where(valores.notna(), "-")
+
+    erro = (status != STATUS_OK).to_numpy()
+    if erro.any():
+        texto_erro = status.astype(object).map(TEXTOS_ERRO)
+        df[coluna_erro] = df[coluna_erro].where(~erro, texto_erro)
+    return df
+
+
+def gravar_excel(destino, abas):
+    """Grava um .xlsx (caminho ou objeto de arquivo) com uma aba por (nome, DataFrame)."""
+    with xlsxwriter.Workbook(destino, {"constant_memory": True}) as workbook:
+        formato_cabecalho = workbook.add_format({"bold": True, "border": 1, "align": "center", "valign": "top"})
+        for aba, df in abas:
+            planilha = workbook.add_worksheet(aba)
+            colunas = list(renderizar(df.iloc[:0]).columns)
+            planilha.write_row(0, 0, colunas, formato_cabecalho)
+
+            linha = 1
+            for inicio in range(0, len(df), TAMANHO_BLOCO):
+                bloco = renderizar(df.iloc[inicio:inicio + TAMANHO_BLOCO]).astype(object)
+                bloco = bloco.where(bloco.notna(), None)
+                for valores in bloco.itertuples(index=False, name=None):
+                    planilha.write_row(linha, 0, valores)
+                    linha += 1
+
+
+def excel(abas):
+    """Bytes de um .xlsx com uma aba por (nome, DataFrame)."""
+    buffer = io.BytesIO()
+    gravar_excel(buffer, abas)
+    return buffer.getvalue()
+
+
+def excel_combinado(resultado):
+    """Bytes do .xlsx com todos os relatórios, um por aba."""
+    return excel(abas_relatorio(resultado))
+
+
+def csv_gz(df):
+    """Tabela tipada (com "Status") em CSV ";" compactado com gzip."""
+    buffer = io.BytesIO()
+    df.to_csv(buffer, sep=";", index=False, compression={"method": "gzip", "compresslevel": 5})
+    return buffer.getvalue()
+
+
+def parquet(df):
+    """Tabela tipada (com "Status") em Parquet."""
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, index=False)
+    return buffer.getvalue()
+
@@ -0,0 +1,316 @@
+# simulador/incremental.py - re-simulação incremental a partir da execução anterior
+#
+# Cada linha da base é identificada por (Produto, Recebedor, Tipo_de_depósito)
+# mais a ordem de ocorrência dessa chave no arquivo, e guarda duas impressões
+# digitais: a dos seus dados de entrada (quantidade e volume unitário) e a das
+# posições do produto na estrutura (posição, tipo, quantidade e volume das bins,
+# já unidos às tabelas de referência). Numa nova execução só são recalculadas as
+# linhas novas, as alteradas e as que tiveram posições ou tipos de bin
+# alterados; as demais reaproveitam suas linhas do detalhado anterior. No encaixe
+# por dimensões, as dimensões do produto entram na impressão dos dados da linha,
+# e as das bins na versão do estado.
+#
+# O nível produto/posição dos resumos é atualizado somando os grupos das linhas
+# recalculadas e subtraindo os das linhas que saíram, sem reagrupar o detalhado;
+# os níveis posição e estrutura saem dele, como na simulação completa.
+
+import time
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from simulador.alocacao import alocar, PRIORIDADE_ONDA
+from simulador.cache_resultados import VERSAO_FORMATO
+from simulador.encaixe import COLUNAS_DIMENSAO, assinatura_bins, dimensoes_produto, tabela_encaixe
+from simulador.motor import COLUNA_ONDA, COLUNAS_CATEGORICAS, COLUNAS_RESULTADO, STATUS_OK, calcular_bins, alinhar_chave
+from simulador.particionamento import calcular_bins_particionado
+from simulador.perfil import PerfilExecucao
+from simulador.referencia import carregar_referencia
+from simulador.resumos import CHAVES_PRODUTO_POSICAO, agregar_produto_posicao, resumir
+from simulador.simulacao import colunas_ausentes, preparar_base, preparar_posicoes
+
+# Incrementar quando o cálculo ou as impressões digitais mudarem (descarta o estado salvo)
+VERSAO_ESTADO = 1
+
+# Etapas cronometradas por simular_incremental(), na ordem de execução
+ETAPAS_INCREMENTAL = ["Validação de colunas", "Tabelas de referência", "Junção de posições", "Encaixe por dimensões", "Comparação com a execução anterior", "Normalização da base", "Cálculo de bins", "Alocação por posição", "Resumos"]
+
+# Colunas da base (como vêm do arquivo) que definem a chave e o resultado de cada linha
+COLUNAS_DADOS = ["Qtd.solicitada total", "Volume", "UM volume"]
+# Colunas das posições que influenciam o detalhado de um produto na estrutura
+COLUNAS_POSICAO = ["Posicao", "Tipo", "Quantidade_Bin", "Volume_max_L"]
+# Somas do nível produto/posição (as de volume são somas de valores com 2 casas)
+SOMAS_NIVEL = ["Bins_Necessarias", "Quantidade_Total", "Volume_Total", "Volumetria_Maxima", "_linhas"]
+SOMAS_ARREDONDADAS = ["Volume_Total", "Volumetria_Maxima"]
+
+
+def _hash(df):
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+
+def impressoes_linhas(df_base, dimensoes=None):
+    """Chave e hash dos dados de cada linha da base, como veio do arquivo (sem normalizar).
+
+    A chave é o hash de Produto, Recebedor e Tipo de depósito (dois primeiros caracteres
+    da Área de atividade), da Onda quando a base juntar várias, e da ordem de ocorrência,
+    que diferencia chaves repetidas. Com `dimensoes` (encaixe por dimensões, ver
+    dimensoes_produto), o hash dos dados inclui as dimensões usadas para o produto da linha.
+    """
+    chaves = pd.DataFrame({
+        "Produto": df_base["Produto"],
+        "Recebedor": df_base["Recebedor mercadoria"],
+        "Tipo_de_depósito": df_base["Área de atividade"].astype(str).str[:2]
+    })
+    if COLUNA_ONDA in df_base.columns:
+        chaves[COLUNA_ONDA] = df_base[COLUNA_ONDA]
+    chaves["_ocorrencia"] = chaves.groupby(list(chaves.columns), sort=False, dropna=False).cumcount()
+    dados = df_base[COLUNAS_DADOS].reset_index(drop=True)
+    if dimensoes is not None:
+        dados[COLUNAS_DIMENSAO] = dimensoes[COLUNAS_DIMENSAO].reindex(df_base["Produto"].to_numpy()).to_numpy(dtype=float)
+    return _hash(chaves), _hash(dados)
+
+
+def _hash_grupo(produto, tipo_deposito):
+    # Grupo (Produto, Tipo_de_depósito) que liga as linhas da base às suas posições
+    return _hash(pd.DataFrame({"Produto": produto, "Tipo_de_depósito": tipo_deposito}).reset_index(drop=True))
+
+
+def impressoes_posicoes(produto_base, df_posicoes_prod):
+    """Hash das posições de cada grupo (Produto, Tipo_de_depósito), indexado pelo hash do grupo.
+
+    Sensível à ordem das posições, que define a ordem das linhas no detalhado.
+    `produto_base` (coluna Produto da base) define o tipo usado na chave do produto.
+    """
+    posicoes = df_posicoes_prod[df_posicoes_prod["Produto"].notna()].reset_index(drop=True)
+    _, produto_pos = alinhar_chave(produto_base, posicoes["Produto"])
+    grupo_linha = _hash_grupo(produto_pos, posicoes["Tipo_de_depósito"])
+
+    grupo, grupos = pd.factorize(grupo_linha)
+    dados = posicoes[COLUNAS_POSICAO].copy()
+    dados["_ordem"] = pd.Series(grupo).groupby(grupo).cumcount().to_numpy()
+    hash_posicoes = np.zeros(len(grupos), dtype=np.uint64)
+    np.add.at(hash_posicoes, grupo, _hash(dados))  # soma com estouro (módulo 2^64)
+    return pd.Series(hash_posicoes, index=grupos)
+
+
+def _consultar(serie, chaves):
+    # Valores de `serie` para cada chave (0 para chaves ausentes)
+    posicao = serie.index.get_indexer(chaves)
+    return np.where(posicao >= 0, serie.to_numpy()[posicao], np.uint64(0))
+
+
+def _intervalos(inicios, tamanhos):
+    # Índices inicio..inicio+tamanho-1 de cada intervalo, concatenados
+    total = int(tamanhos.sum())
+    deslocamento = np.arange(total) - np.repeat(np.cumsum(tamanhos) - tamanhos, tamanhos)
+    return np.repeat(inicios, tamanhos) + deslocamento
+
+
+def _versao_estado(referencia, encaixe_dimensoes):
+    # Com encaixe, as medidas das bins (fora das impressões das posições) também definem o estado
+    versao = f"{VERSAO_ESTADO}.{VERSAO_FORMATO}"
+    return f"{versao}:{assinatura_bins(referencia.df_tipo_bin)}" if encaixe_dimensoes else versao
+
+
+def _estado_valido(anterior, versao):
+    if anterior is None:
+        return False
+    if anterior["indicadores"].get("versao") != versao:
+        return False
+    linhas = anterior["tabelas"]["linhas"]
+    return linhas["_hash_chave"].is_unique and int(linhas["_linhas_resultado"].sum()) == len(anterior["tabelas"]["df_resultado"])
+
+
+def _unir_categorias(partes):
+    """Concatena colunas categóricas com categorias ordenadas e só as usadas, como em categorizar()."""
+    partes = [pd.Categorical(p) for p in partes if len(p)] or [pd.Categorical(partes[0])]
+    if len({str(p.categories.dtype) for p in partes}) > 1:
+        # Categorias de tipos diferentes (ex.: produto numérico e texto)
+        return pd.Categorical(np.concatenate([np.asarray(p, dtype=object) for p in partes]))
+
+    categorias = partes[0].categories
+    for parte in partes[1:]:
+        categorias = categorias.union(parte.categories)
+    codigos = np.concatenate([np.where(p.codes >= 0, categorias.get_indexer(p.categories)[p.codes], -1) for p in partes])
+    usadas = np.bincount(codigos[codigos >= 0], minlength=len(categorias)) > 0
+    codigos = np.where(codigos >= 0, np.cumsum(usadas)[codigos] - 1, -1)
+    return pd.Categorical.from_codes(codigos, categorias[usadas])
+
+
+def _juntar_detalhado(df_reaproveitado, linhas_reaproveitadas, df_novo, linhas_novas):
+    """Detalhado na ordem da base a partir das linhas reaproveitadas e das recalculadas."""
+    if not len(df_novo):
+        return df_reaproveitado.reset_index(drop=True)
+    ordem = np.argsort(np.concatenate([linhas_reaproveitadas, linhas_novas]), kind="stable")
+
+    nomes = [COLUNA_ONDA] + COLUNAS_RESULTADO if COLUNA_ONDA in df_novo.columns else COLUNAS_RESULTADO
+    colunas = {}
+    for col in nomes:
+        partes = [df_reaproveitado[col], df_novo[col]]
+        if col in COLUNAS_CATEGORICAS:
+            colunas[col] = _unir_categorias(partes)
+        else:
+            colunas[col] = pd.concat(partes, ignore_index=True).array
+    return pd.DataFrame(colunas, columns=nomes).take(ordem).reset_index(drop=True)
+
+
+def _atualizar_nivel(nivel_anterior, df_saida, df_entrada):
+    """Nível produto/posição atualizado: grupos das linhas recalculadas menos os das que saíram."""
+    if not len(df_saida) and not len(df_entrada):
+        return nivel_anterior
+    menos = agregar_produto_posicao(df_saida, contar_linhas=True)
+    mais = agregar_produto_posicao(df_entrada, contar_linhas=True)
+    for col in SOMAS_NIVEL:
+        menos[col] = -menos[col]
+
+    # Bins disponíveis: valor das linhas recalculadas, senão o anterior
+    partes = [mais, nivel_anterior, menos]
+    df = pd.concat([parte.drop(columns=CHAVES_PRODUTO_POSICAO) for parte in partes], ignore_index=True)
+    for col in CHAVES_PRODUTO_POSICAO:
+        df[col] = _unir_categorias([parte[col] for parte in partes])
+    agregacoes = {col: (col, "sum") for col in SOMAS_NIVEL}
+    agregacoes["Bins_Disponiveis"] = ("Bins_Disponiveis", "first")
+    nivel = df.groupby(CHAVES_PRODUTO_POSICAO, observed=True, sort=False).agg(**agregacoes).reset_index()
+    nivel = nivel[(nivel["_linhas"] > 0).to_numpy()].reset_index(drop=True)
+
+    # Somas e subtrações de valores com 2 casas: arredondar evita acumular resíduos entre execuções
+    for col in SOMAS_ARREDONDADAS:
+        nivel[col] = nivel[col].round(2)
+    for col in CHAVES_PRODUTO_POSICAO:
+        nivel[col] = nivel[col].cat.remove_unused_categories()
+    return nivel[nivel_anterior.columns]
+
+
+def simular_incremental(df_base, df_posicoes_prod, anterior=None, referencia=None, workers=1, perfil=None, prioridade=PRIORIDADE_ONDA,
+                        encaixe_dimensoes=False):
+    """Simulação que reaproveita a execução anterior; retorna (resultado, estado).
+
+    `resultado` tem o mesmo formato do de simular() e, nos indicadores, "linhas_recalculadas".
+    `estado` (dict com "tabelas" e "indicadores", gravável num CacheResultados) é o
+    `anterior` da próxima execução; sem ele, ou se for de outra versão ou de outro modo de
+    encaixe (`encaixe_dimensoes`, como em simular()), tudo é recalculado.
+    A alocação por posição depende de todas as linhas da posição e é refeita sobre o detalhado inteiro.
+    Levanta ValueError se faltarem colunas obrigatórias.
+    """
+    inicio_tempo = time.time()
+    if perfil is None:
+        perfil = PerfilExecucao()
+
+    with perfil.etapa("Validação de colunas", len(df_base)):
+        erros = colunas_ausentes(df_base, df_posicoes_prod)
+        if erros:
+            raise ValueError("; ".join(erros))
+
+    with perfil.etapa("Tabelas de referência") as etapa:
+        if referencia is None:
+            referencia = carregar_referencia()
+        etapa["linhas"] = len(referencia.df_tipo_bin)
+
+    with perfil.etapa("Junção de posições", len(df_posicoes_prod)):
+        df_posicoes_prod = preparar_posicoes(df_posicoes_prod, referencia)
+
+    # As dimensões vêm da base inteira: a primeira linha de um produto pode não ser recalculada
+    with perfil.etapa("Encaixe por dimensões") as etapa:
+        dimensoes = dimensoes_produto(df_base) if encaixe_dimensoes else None
+        encaixe = tabela_encaixe(dimensoes, referencia.df_tipo_bin) if encaixe_dimensoes else None
+        etapa["linhas"] = len(encaixe.produtos) if encaixe is not None else 0
+
+    # --- Diferenças em relação à execução anterior (sobre a base como veio do arquivo) ---
+    versao = _versao_estado(referencia, encaixe_dimensoes)
+    with perfil.etapa("Comparação com a execução anterior", len(df_base)):
+        hash_chave, hash_linha = impressoes_linhas(df_base, dimensoes)
+        posicoes_grupo = impressoes_posicoes(df_base["Produto"], df_posicoes_prod)
+        hash_grupo = np.zeros(len(df_base), dtype=np.uint64)
+        hash_posicoes = np.zeros(len(df_base), dtype=np.uint64)
+
+        reaproveitar = np.zeros(len(df_base), dtype=bool)
+        if _estado_valido(anterior, versao) and pd.Index(hash_chave).is_unique:
+            linhas_anteriores = anterior["tabelas"]["linhas"]
+            anterior_idx = pd.Index(linhas_anteriores["_hash_chave"]).get_indexer(hash_chave)
+            encontrada = anterior_idx >= 0
+            idx = np.where(encontrada, anterior_idx, 0)
+            grupo_anterior = linhas_anteriores["_hash_grupo"].to_numpy()[idx]
+            posicoes_anterior = linhas_anteriores["_hash_posicoes"].to_numpy()[idx]
+            # Mesmos dados e as posições do grupo (posição, tipo e capacidade das bins) sem alteração
+            reaproveitar = (
+                encontrada
+                & (linhas_anteriores["_hash_linha"].to_numpy()[idx] == hash_linha)
+                & (_consultar(posicoes_grupo, grupo_anterior) == posicoes_anterior)
+            )
+            hash_grupo[reaproveitar] = grupo_anterior[reaproveitar]
+            hash_posicoes[reaproveitar] = posicoes_anterior[reaproveitar]
+
+            tamanhos_anteriores = linhas_anteriores["_linhas_resultado"].to_numpy()
+            inicios_anteriores = np.cumsum(tamanhos_anteriores) - tamanhos_anteriores
+            # Linhas do detalhado anterior que continuam valendo e as que saem
+            usadas = anterior_idx[reaproveitar]
+            linhas_resultado_anterior = _intervalos(inicios_anteriores[usadas], tamanhos_anteriores[usadas])
+            sai = np.ones(len(anterior["tabelas"]["df_resultado"]), dtype=bool)
+            sai[linhas_resultado_anterior] = False
+        recalcular = np.flatnonzero(~reaproveitar)
+
+    # Só as linhas recalculadas são normalizadas
+    with perfil.etapa("Normalização da base", len(recalcular)):
+        df_recalculo = preparar_base(df_base.iloc[recalcular])
+        produto_recalculo, _ = alinhar_chave(df_recalculo["Produto"], df_posicoes_prod["Produto"])
+        hash_grupo[recalcular] = _hash_grupo(produto_recalculo, df_recalculo["Tipo_de_depósito"])
+        hash_posicoes[recalcular] = _consultar(posicoes_grupo, hash_grupo[recalcular])
+
+    with perfil.etapa("Cálculo de bins", len(recalcular)):
+        if workers and workers > 1:
+            df_novo, _ = calcular_bins_particionado(df_recalculo, df_posicoes_prod, workers, incluir_linha=True, encaixe=encaixe)
+        else:
+            df_novo, _ = calcular_bins(df_recalculo, df_posicoes_prod, incluir_linha=True, encaixe=encaixe)
+        linhas_novas = recalcular[df_novo["_linha"].to_numpy()]
+        df_novo = df_novo.drop(columns="_linha")
+
+        if reaproveitar.any():
+            df_anterior = anterior["tabelas"]["df_resultado"]
+            df_reaproveitado = df_anterior.take(linhas_resultado_anterior)
+            linhas_reaproveitadas = np.repeat(np.flatnonzero(reaproveitar), tamanhos_anteriores[usadas])
+            df_resultado = _juntar_detalhado(df_reaproveitado, linhas_reaproveitadas, df_novo, linhas_novas)
+            linhas_detalhado = np.concatenate([linhas_reaproveitadas, linhas_novas])
+        else:
+            df_resultado = df_novo
+            linhas_detalhado = linhas_novas
+        contador_sucesso = int((df_resultado["Status"] == STATUS_OK).sum())
+
+    with perfil.etapa("Alocação por posição", len(df_resultado)):
+        alocar(df_resultado, prioridade)
+
+    with perfil.etapa("Resumos", len(df_novo)):
+        if reaproveitar.any():
+            nivel_produto = _atualizar_nivel(anterior["tabelas"]["nivel_produto"], df_anterior[sai], df_novo)
+        else:
+            nivel_produto = agregar_produto_posicao(df_resultado, contar_linhas=True)
+        tabelas = {"df_resultado": df_resultado}
+        tabelas.update(resumir(df_resultado, df_posicoes_prod, nivel_produto))
+
+    estado = {
+        "tabelas": {
+            "df_resultado": df_resultado,
+            "linhas": pd.DataFrame({
+                "_hash_chave": hash_chave,
+                "_hash_linha": hash_linha,
+                "_hash_grupo": hash_grupo,
+                "_hash_posicoes": hash_posicoes,
+                "_linhas_resultado": np.bincount(linhas_detalhado, minlength=len(df_base))
+            }),
+            "nivel_produto": nivel_produto
+        },
+        "indicadores": {"versao": versao}
+    }
+
+    tempo_total = time.time() - inicio_tempo
+    resultado = {
+        "tabelas": tabelas,
+        "indicadores": {
+            "tempo_formatado": str(datetime.timedelta(seconds=int(tempo_total))),
+            "total_linhas_base": len(df_base),
+            "contador_sucesso": contador_sucesso,
+            "linhas_recalculadas": len(recalcular),
+            "etapas": perfil.etapas
+        }
+    }
+    return resultado, estado
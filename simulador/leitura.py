@@ -0,0 +1,134 @@
+# simulador/leitura.py - leitura do arquivo de simulação (.xlsx)
+#
+# O arquivo é aberto uma única vez para as duas abas, e só as colunas usadas
+# são carregadas, com tipos de texto explícitos. Antes disso os cabeçalhos são
+# conferidos numa passada somente-leitura (openpyxl em modo streaming, só a
+# primeira linha de cada aba), para recusar arquivos inválidos sem carregar os
+# dados. Com o python-calamine instalado a leitura usa o motor em Rust, bem
+# mais rápido que o openpyxl.
+#
+# As abas lidas podem ficar num CacheResultados (memória + Parquet em disco),
+# pela hash do conteúdo: reenviar o mesmo arquivo não lê o .xlsx de novo.
+
+import hashlib
+import importlib.util
+import io
+
+import openpyxl
+import pandas as pd
+
+from simulador.encaixe import COLUNAS_OPCIONAIS_BASE, COLUNA_UM_DIMENSAO
+from simulador.simulacao import ABA_BASE, ABA_POSICOES, COLUNAS_OBRIGATORIAS_BASE, COLUNAS_OBRIGATORIAS_POS, colunas_ausentes
+
+# Colunas lidas além das obrigatórias, quando existirem
+COLUNAS_OPCIONAIS_POS = ["Descrição breve do produto"]
+
+# Códigos lidos como texto, preservando zeros à esquerda ("0055")
+TIPOS_TEXTO = {
+    ABA_BASE: {"Recebedor mercadoria": str, "UM peso": str, "UM volume": str, "Área de atividade": str, COLUNA_UM_DIMENSAO: str},
+    ABA_POSICOES: {"Posição no depósito": str, "Tipo de depósito": str, "Área armazmto": str, "Descrição breve do produto": str}
+}
+
+# Incrementar quando as colunas ou os tipos lidos mudarem (invalida o cache em disco)
+VERSAO_LEITURA = 2
+
+
+class PlanilhaInvalida(ValueError):
+    """Arquivo sem as abas ou colunas obrigatórias; `erros` traz uma mensagem por problema."""
+
+    def __init__(self, erros):
+        super().__init__("; ".join(erros))
+        self.erros = erros
+
+    def __reduce__(self):
+        # Reconstrução a partir da lista de erros (exceção devolvida por um processo do pool)
+        return PlanilhaInvalida, (self.erros,)
+
+
+def motor_excel():
+    return "calamine" if importlib.util.find_spec("python_calamine") else "openpyxl"
+
+
+def conteudo_arquivo(arquivo):
+    """Bytes do arquivo (caminho, bytes ou objeto de arquivo, como o do st.file_uploader)."""
+    if isinstance(arquivo, (bytes, bytearray)):
+        return bytes(arquivo)
+    if hasattr(arquivo, "getvalue"):
+        return arquivo.getvalue()
+    if hasattr(arquivo, "read"):
+        arquivo.seek(0)
+        return arquivo.read()
+    with open(arquivo, "rb") as f:
+        return f.read()
+
+
+def chave_entrada(conteudo):
+    h = hashlib.sha256(conteudo)
+    h.update(f"entrada:{VERSAO_LEITURA}".encode())
+    return h.hexdigest()
+
+
+def cabecalhos(conteudo):
+    """Cabeçalho de cada aba do arquivo, lendo apenas a primeira linha (None se a aba não existir)."""
+    workbook = openpyxl.load_workbook(io.BytesIO(conteudo), read_only=True, data_only=True)
+    try:
+        resultado = {}
+        for aba in (ABA_BASE, ABA_POSICOES):
+            if aba not in workbook.sheetnames:
+                resultado[aba] = None
+                continue
+            primeira_linha = next(workbook[aba].iter_rows(max_row=1, values_only=True), ())
+            resultado[aba] = [c for c in primeira_linha if c is not None]
+        return resultado
+    finally:
+        workbook.close()
+
+
+def validar_cabecalhos(colunas):
+    """Mensagens de abas e colunas obrigatórias ausentes (vazia se estiver tudo certo)."""
+    erros = [f"Aba obrigatória ausente: {aba}" for aba, nomes in colunas.items() if nomes is None]
+    if erros:
+        return erros
+    return colunas_ausentes(pd.DataFrame(columns=colunas[ABA_BASE]), pd.DataFrame(columns=colunas[ABA_POSICOES]))
+
+
+def ler_planilha(arquivo, cache=None):
+    """Lê as duas abas do arquivo de simulação; retorna (df_base, df_posicoes_prod).
+
+    Com `cache` (um CacheResultados) as abas já lidas do mesmo conteúdo vêm do cache.
+    Levanta PlanilhaInvalida se faltarem abas ou colunas obrigatórias.
+    """
+    conteudo = conteudo_arquivo(arquivo)
+    if cache is not None:
+        abas = entrada_em_cache(conteudo, cache)
+        if abas is not None:
+            return abas
+
+    colunas = cabecalhos(conteudo)
+    erros = validar_cabecalhos(colunas)
+    if erros:
+        raise PlanilhaInvalida(erros)
+
+    # Dimensões do item (encaixe por dimensões) e descrição do produto, quando o arquivo as tiver
+    colunas_base = COLUNAS_OBRIGATORIAS_BASE + [c for c in COLUNAS_OPCIONAIS_BASE if c in colunas[ABA_BASE]]
+    colunas_pos = COLUNAS_OBRIGATORIAS_POS + [c for c in COLUNAS_OPCIONAIS_POS if c in colunas[ABA_POSICOES]]
+    with pd.ExcelFile(io.BytesIO(conteudo), engine=motor_excel()) as planilha:
+        df_base = planilha.parse(ABA_BASE, usecols=colunas_base, dtype=TIPOS_TEXTO[ABA_BASE])
+        df_posicoes_prod = planilha.parse(ABA_POSICOES, usecols=colunas_pos, dtype=TIPOS_TEXTO[ABA_POSICOES])
+
+    if cache is not None:
+        guardar_entrada(conteudo, cache, df_base, df_posicoes_prod)
+    return df_base, df_posicoes_prod
+
+
+def entrada_em_cache(conteudo, cache):
+    """(df_base, df_posicoes_prod) já lidos do mesmo conteúdo, ou None."""
+    entrada = cache.obter(chave_entrada(conteudo))
+    if entrada is None:
+        return None
+    return entrada["tabelas"]["base"], entrada["tabelas"]["posicoes"]
+
+
+def guardar_entrada(conteudo, cache, df_base, df_posicoes_prod):
+    cache.guardar(chave_entrada(conteudo), {"tabelas": {"base": df_base, "posicoes": df_posicoes_prod}, "indicadores": {"motor": motor_excel()}})
+
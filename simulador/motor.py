@@ -0,0 +1,192 @@
+# simulador/motor.py - motor vetorizado do cálculo de bins
+#
+# Substitui o laço linha a linha (iterrows) por um único join da base com as
+# posições/tipos de bin e por operações de coluna inteira em NumPy.
+
+import numpy as np
+import pandas as pd
+
+# Códigos de status de cada linha do resultado (coluna categórica "Status")
+STATUS_OK = "OK"
+STATUS_SEM_POSICAO = "Produto sem posição"
+STATUS_BIN_SEM_VOLUME = "Bin sem volume"
+STATUS_NAO_CABE = "Item não cabe na bin"
+CATEGORIAS_STATUS = [STATUS_OK, STATUS_SEM_POSICAO, STATUS_BIN_SEM_VOLUME, STATUS_NAO_CABE]
+
+# Textos exibidos nos relatórios (gerados apenas na exportação/exibição)
+ERRO_SEM_POSICAO = f"Erro: {STATUS_SEM_POSICAO}"
+ERRO_BIN_SEM_VOLUME = f"Erro: {STATUS_BIN_SEM_VOLUME}"
+ERRO_NAO_CABE = f"Erro: {STATUS_NAO_CABE}"
+
+COLUNAS_RESULTADO = [
+    "Produto", "Recebedor", "Estrutura", "Posicao", "Tipo_Bin",
+    "Bins_Necessarias", "Bins_Disponiveis", "Diferença",
+    "Quantidade_Total", "Volume_Total", "Volumetria_Máxima", "Status"
+]
+# Onda de origem da linha, quando a base junta vários arquivos (ver simulador.ondas)
+COLUNA_ONDA = "Onda"
+COLUNAS_CATEGORICAS = [COLUNA_ONDA, "Produto", "Recebedor", "Estrutura", "Posicao", "Tipo_Bin"]
+COLUNAS_NUMERICAS = ["Bins_Necessarias", "Bins_Disponiveis", "Diferença", "Quantidade_Total", "Volume_Total", "Volumetria_Máxima"]
+
+
+def arredondar(valores, casas=2):
+    """Arredondamento do round() do Python (pelo valor exato do float) em colunas inteiras.
+
+    O np.round multiplica por 10**casas antes de arredondar e diverge nos valores
+    próximos da metade (2.215 -> 2.22, e não 2.21); só esses passam pelo round().
+    """
+    valores = np.asarray(valores, dtype=float)
+    resultado = np.round(valores, casas)
+    with np.errstate(invalid="ignore"):
+        escala = valores * 10.0 ** casas
+        perto_da_metade = np.flatnonzero(np.abs(escala - np.floor(escala) - 0.5) < 1e-6)
+    resultado[perto_da_metade] = [round(v, casas) for v in valores[perto_da_metade].tolist()]
+    return resultado
+
+
+def anulavel(valores, validos):
+    """Coluna numérica anulável (Int64/Float64): <NA> onde `validos` é falso."""
+    coluna = pd.array(np.asarray(valores))
+    coluna[~validos] = pd.NA
+    return coluna
+
+
+def categorizar(df):
+    """Converte as colunas de texto do resultado para categóricas (inclusive após concatenações)."""
+    for col in COLUNAS_CATEGORICAS:
+        if col in df.columns:
+            df[col] = pd.Categorical(np.asarray(df[col], dtype=object))
+    df["Status"] = pd.Categorical(np.asarray(df["Status"], dtype=object), categories=CATEGORIAS_STATUS)
+    return df
+
+
+def alinhar_chave(esquerda, direita):
+    """As duas colunas de chave com dtypes compatíveis para o merge (object quando diferem).
+
+    O filtro original usava "==", que compara valores; o merge exige dtypes compatíveis.
+    """
+    if esquerda.dtype != direita.dtype:
+        return esquerda.astype(object), direita.astype(object)
+    return esquerda, direita
+
+
+def juntar_base_posicoes(df_base, df_posicoes_prod):
+    """Join único base × posições (produto + estrutura), na ordem da base e das posições.
+
+    Cada linha da base aparece uma vez por posição do produto (ou uma vez, sem posição).
+    Colunas: _linha, Produto, Recebedor, Estrutura, _volume_unitario, _qtd, _ordem_pos
+    (índice da posição em `df_posicoes_prod`; NaN sem posição), Posicao, Tipo_Bin,
+    _volume_max e _qtd_bin; e Onda, se a base tiver essa coluna.
+    """
+    produto_base, produto_pos = alinhar_chave(df_base["Produto"], df_posicoes_prod["Produto"])
+
+    base = pd.DataFrame({
+        "_linha": np.arange(len(df_base)),
+        "Produto": produto_base.to_numpy(),
+        "Recebedor": df_base["Recebedor mercadoria"].to_numpy(),
+        "Estrutura": df_base["Tipo_de_depósito"].to_numpy(),
+        "_volume_unitario": df_base["Volume unitário (L)"].to_numpy(),
+        "_qtd": df_base["Qtd.solicitada total"].to_numpy(),
+    })
+    if COLUNA_ONDA in df_base.columns:
+        base[COLUNA_ONDA] = df_base[COLUNA_ONDA].to_numpy()
+
+    posicoes = pd.DataFrame({
+        "_ordem_pos": np.arange(len(df_posicoes_prod)),
+        "Produto": produto_pos.to_numpy(),
+        "Estrutura": df_posicoes_prod["Tipo_de_depósito"].to_numpy(),
+        "Posicao": df_posicoes_prod["Posicao"].to_numpy(),
+        "Tipo_Bin": df_posicoes_prod["Tipo"].to_numpy(),
+        "_volume_max": pd.to_numeric(df_posicoes_prod["Volume_max_L"], errors="coerce").to_numpy(dtype=float),
+        "_qtd_bin": df_posicoes_prod["Quantidade_Bin"].to_numpy(),
+    })
+    # Produto vazio nunca casava no filtro por igualdade
+    posicoes = posicoes[posicoes["Produto"].notna()]
+
+    df = base.merge(posicoes, on=["Produto", "Estrutura"], how="left", sort=False)
+    return df.sort_values(["_linha", "_ordem_pos"], kind="stable", na_position="last", ignore_index=True)
+
+
+def calcular_bins(df_base, df_posicoes_prod, incluir_linha=False, encaixe=None):
+    """Calcula as bins necessárias de cada linha da base em cada posição do produto.
+
+    `df_base` já normalizada (Tipo_de_depósito, Volume unitário (L), Qtd.solicitada total)
+    e `df_posicoes_prod` já unida à capacidade das posições.
+    Retorna (df_resultado, contador_sucesso). O resultado é tipado: colunas numéricas
+    anuláveis (<NA> nas linhas com erro), "Status" categórico e textos como categóricas.
+    Com `incluir_linha`, o resultado traz a coluna
+    "_linha" com a posição (0..n-1) da linha de origem em `df_base`. Se a base tiver a
+    coluna "Onda" (várias ondas simuladas juntas), ela é a primeira do resultado.
+    Com `encaixe` (uma TabelaEncaixe), as linhas cujo produto e tipo de bin têm dimensões
+    usam as unidades por bin da tabela no lugar do volume; as demais seguem pelo volume.
+    """
+    # --- Join único base × posições, na ordem da base e das posições ---
+    df = juntar_base_posicoes(df_base, df_posicoes_prod)
+
+    # --- Máscaras de erro ---
+    sem_posicao = df["_ordem_pos"].isna().to_numpy()
+    volume_max = df["_volume_max"].to_numpy(dtype=float)
+    sem_volume = ~sem_posicao & ~(volume_max > 0)
+    ok = ~sem_posicao & ~sem_volume
+
+    # --- Encaixe por dimensões: consulta das unidades por bin de cada (Produto, Tipo de bin) ---
+    unidades = np.full(len(df), np.nan)
+    if encaixe is not None:
+        unidades = encaixe.consultar(df["Produto"], df["Tipo_Bin"])
+    com_encaixe = ok & ~np.isnan(unidades)
+    nao_cabe = com_encaixe & (unidades == 0)
+    ok &= ~nao_cabe
+    com_encaixe &= ~nao_cabe
+
+    # --- Cálculo em colunas inteiras (linhas com erro recebem valores neutros) ---
+    qtd = df["_qtd"].to_numpy()
+    volume_unitario = df["_volume_unitario"].to_numpy(dtype=float)
+    divisor = np.where(ok, volume_max, 1.0)
+
+    volume_total = volume_unitario * qtd
+    bins_float = -(-volume_total // divisor)  # teto da divisão
+    if com_encaixe.any():
+        bins_float = np.where(com_encaixe, -(-qtd // np.where(com_encaixe, unidades, 1.0)), bins_float)
+    if not np.isfinite(bins_float[ok]).all():
+        raise ValueError("Volume total inválido (verifique linhas com Qtd.solicitada total igual a zero)")
+    bins_necessarias = np.where(ok, bins_float, 0).astype(np.int64)
+
+    qtd_bin = pd.to_numeric(df["_qtd_bin"], errors="coerce").to_numpy(dtype=float)
+    bins_disponiveis = np.trunc(np.where(ok, np.nan_to_num(qtd_bin), 0)).astype(np.int64)
+
+    diferenca = bins_disponiveis - bins_necessarias
+    quantidade_total = np.minimum(bins_necessarias * qtd, qtd)
+    volume_total_bins = arredondar(quantidade_total * volume_unitario)
+    volumetria_maxima = arredondar(bins_disponiveis * np.where(ok, volume_max, 0))
+
+    # --- Montagem do resultado (colunas tipadas; o texto dos erros só é gerado na exportação) ---
+    status = np.select([sem_posicao, sem_volume, nao_cabe], [STATUS_SEM_POSICAO, STATUS_BIN_SEM_VOLUME, STATUS_NAO_CABE], STATUS_OK)
+
+    # Em "Bin sem volume" e "Item não cabe na bin" a quantidade de bins da posição continua informada
+    informar_disponiveis = sem_volume | nao_cabe
+    disponiveis_sem_volume = np.trunc(np.nan_to_num(qtd_bin)).astype(np.int64)
+    bins_disponiveis = np.where(informar_disponiveis, disponiveis_sem_volume, bins_disponiveis)
+    com_disponiveis = ok | (informar_disponiveis & ~np.isnan(qtd_bin))
+
+    df_resultado = pd.DataFrame({
+        "Produto": df["Produto"].to_numpy(),
+        "Recebedor": df["Recebedor"].to_numpy(),
+        "Estrutura": df["Estrutura"].to_numpy(),
+        "Posicao": np.where(sem_posicao, "N/A", df["Posicao"].to_numpy(dtype=object)),
+        "Tipo_Bin": np.where(sem_posicao, "N/A", df["Tipo_Bin"].to_numpy(dtype=object)),
+        "Bins_Necessarias": anulavel(bins_necessarias, ok),
+        "Bins_Disponiveis": anulavel(bins_disponiveis, com_disponiveis),
+        "Diferença": anulavel(diferenca, ok),
+        "Quantidade_Total": anulavel(quantidade_total, ok),
+        "Volume_Total": anulavel(volume_total_bins, ok),
+        "Volumetria_Máxima": anulavel(volumetria_maxima, ok),
+        "Status": status,
+    }, columns=COLUNAS_RESULTADO)
+    if COLUNA_ONDA in df.columns:
+        df_resultado.insert(0, COLUNA_ONDA, df[COLUNA_ONDA].to_numpy())
+    categorizar(df_resultado)
+
+    if incluir_linha:
+        df_resultado["_linha"] = df["_linha"].to_numpy()
+
+    return df_resultado, int(ok.sum())
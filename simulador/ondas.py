@@ -0,0 +1,106 @@
+# simulador/ondas.py - várias ondas (arquivos) simuladas como uma única base
+#
+# A operação divide a demanda do dia em um arquivo por onda, todos com o mesmo
+# mapeamento info_posicao_produtos. Os arquivos são lidos em paralelo num pool
+# de processos (os já lidos vêm do cache de entradas), as bases são empilhadas
+# com a coluna "Onda" e o mapeamento de posições entra uma única vez. A junção
+# acontece só nos DataFrames: nenhum .xlsx combinado é gerado.
+
+import hashlib
+import os
+
+import pandas as pd
+
+from simulador.leitura import ler_planilha, entrada_em_cache, guardar_entrada, PlanilhaInvalida
+from simulador.motor import COLUNA_ONDA
+from simulador.particionamento import pool_processos
+from simulador.simulacao import COLUNAS_OBRIGATORIAS_POS
+
+
+def nomes_ondas(nomes_arquivos):
+    """Nome de cada onda: o nome do arquivo sem extensão (repetidos recebem " (2)", " (3)"...)."""
+    nomes = []
+    for nome_arquivo in nomes_arquivos:
+        base = os.path.splitext(os.path.basename(nome_arquivo))[0]
+        nome, n = base, 1
+        while nome in nomes:
+            n += 1
+            nome = f"{base} ({n})"
+        nomes.append(nome)
+    return nomes
+
+
+def conteudo_ondas(arquivos):
+    """Identidade do conjunto de arquivos [(nome, bytes)] para chave_resultado.
+
+    Um único arquivo mantém a chave de sempre (o próprio conteúdo); várias ondas
+    usam o nome e o hash de cada arquivo, na ordem de envio.
+    """
+    if len(arquivos) == 1:
+        return arquivos[0][1]
+    return b"".join(nome.encode() + b"\0" + hashlib.sha256(conteudo).digest() for nome, conteudo in arquivos)
+
+
+def ler_arquivos(arquivos, workers=None, cache=None):
+    """Abas (df_base, df_posicoes_prod) de cada arquivo [(nome, bytes)], na ordem.
+
+    Os arquivos fora do `cache` são lidos em paralelo em até `workers` processos
+    (padrão: um por CPU). Levanta PlanilhaInvalida com os problemas de todos os
+    arquivos, cada mensagem precedida do nome do arquivo.
+    """
+    planilhas = [entrada_em_cache(conteudo, cache) if cache is not None else None for _, conteudo in arquivos]
+    faltam = [i for i, abas in enumerate(planilhas) if abas is None]
+    workers = min(workers or os.cpu_count() or 1, len(faltam))
+
+    erros = []
+    if workers > 1:
+        with pool_processos(workers) as pool:
+            futuros = {i: pool.submit(ler_planilha, arquivos[i][1]) for i in faltam}
+            for i, futuro in futuros.items():
+                try:
+                    planilhas[i] = futuro.result()
+                except PlanilhaInvalida as e:
+                    erros += [f"{arquivos[i][0]}: {erro}" for erro in e.erros]
+    else:
+        for i in faltam:
+            try:
+                planilhas[i] = ler_planilha(arquivos[i][1])
+            except PlanilhaInvalida as e:
+                erros += [f"{arquivos[i][0]}: {erro}" for erro in e.erros]
+    if erros:
+        raise PlanilhaInvalida(erros)
+
+    if cache is not None:
+        for i in faltam:
+            guardar_entrada(arquivos[i][1], cache, *planilhas[i])
+    return planilhas
+
+
+def combinar_ondas(nomes, planilhas):
+    """Uma base com a coluna "Onda" (na ordem das ondas) e o mapeamento de posições sem repetições.
+
+    Mapeamentos idênticos entram uma única vez; entre os diferentes, cada
+    (posição, tipo de depósito, área, produto) fica com a primeira ocorrência.
+    """
+    df_base = pd.concat([df.assign(**{COLUNA_ONDA: nome}) for nome, (df, _) in zip(nomes, planilhas)], ignore_index=True)
+
+    posicoes, vistos = [], set()
+    for _, df_posicoes_prod in planilhas:
+        assinatura = (df_posicoes_prod.shape, tuple(df_posicoes_prod.columns), int(pd.util.hash_pandas_object(df_posicoes_prod, index=False).sum()))
+        if assinatura not in vistos:
+            vistos.add(assinatura)
+            posicoes.append(df_posicoes_prod)
+    df_posicoes_prod = posicoes[0] if len(posicoes) == 1 else pd.concat(posicoes, ignore_index=True).drop_duplicates(COLUNAS_OBRIGATORIAS_POS, ignore_index=True)
+    return df_base, df_posicoes_prod
+
+
+def ler_ondas(arquivos, workers=None, cache=None):
+    """(df_base, df_posicoes_prod) de um ou mais arquivos [(nome, bytes)].
+
+    Um arquivo é lido como sempre (sem a coluna "Onda"); vários viram uma base
+    única com a coluna "Onda" (ver combinar_ondas). Levanta PlanilhaInvalida.
+    """
+    if len(arquivos) == 1:
+        return ler_planilha(arquivos[0][1], cache=cache)
+    planilhas = ler_arquivos(arquivos, workers=workers, cache=cache)
+    return combinar_ondas(nomes_ondas([nome for nome, _ in arquivos]), planilhas)
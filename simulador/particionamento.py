@@ -0,0 +1,77 @@
+# simulador/particionamento.py - execução do cálculo em partições por produto
+#
+# A base é dividida pelo hash do Produto; cada partição leva só as posições dos
+# seus produtos e é calculada num processo do pool. Como todas as posições de um
+# produto caem na mesma partição, juntar os resultados parciais pela linha de
+# origem reproduz exatamente o resultado do modo em processo único.
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from simulador.motor import calcular_bins, categorizar
+
+
+def pool_processos(workers):
+    """ProcessPoolExecutor com `workers` processos iniciados por forkserver (spawn onde não existir, como no Windows).
+
+    A página roda as simulações em threads, e o fork de um processo com threads pode travar.
+    """
+    metodo = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(metodo))
+
+
+def particionar(produto, particoes):
+    """Número da partição (0..particoes-1) de cada valor de Produto.
+
+    Valores numéricos são comparados como número (1 e 1.0 caem juntos, como no "=="),
+    os demais pelo texto.
+    """
+    numerico = pd.to_numeric(produto, errors="coerce")
+    hash_numero = pd.util.hash_array(numerico.to_numpy(dtype=float))
+    hash_texto = pd.util.hash_array(produto.astype(str).to_numpy(dtype=object))
+    hashes = np.where(numerico.notna().to_numpy(), hash_numero, hash_texto)
+    return (hashes % np.uint64(particoes)).astype(np.int64)
+
+
+def _calcular_particao(df_base, df_posicoes_prod, linhas, encaixe=None):
+    # Executado no processo do pool: devolve o resultado parcial com a linha global de origem
+    df_parcial, contador = calcular_bins(df_base, df_posicoes_prod, incluir_linha=True, encaixe=encaixe)
+    df_parcial["_linha"] = linhas[df_parcial["_linha"].to_numpy()]
+    return df_parcial, contador
+
+
+def calcular_bins_particionado(df_base, df_posicoes_prod, workers=None, particoes=None, incluir_linha=False, encaixe=None):
+    """Mesmo contrato de `calcular_bins`, executado em partições num pool de processos."""
+    workers = workers or os.cpu_count() or 1
+    particoes = particoes or workers
+
+    particao_base = particionar(df_base["Produto"], particoes)
+    particao_pos = particionar(df_posicoes_prod["Produto"], particoes)
+
+    tarefas = []
+    for p in range(particoes):
+        linhas = np.flatnonzero(particao_base == p)
+        if len(linhas):
+            tarefas.append((df_base.iloc[linhas], df_posicoes_prod[particao_pos == p], linhas, encaixe))
+
+    if workers == 1 or len(tarefas) <= 1:
+        parciais = [_calcular_particao(*t) for t in tarefas]
+    else:
+        with pool_processos(min(workers, len(tarefas))) as pool:
+            parciais = list(pool.map(_calcular_particao, *zip(*tarefas)))
+
+    if not parciais:
+        return calcular_bins(df_base, df_posicoes_prod, incluir_linha=incluir_linha, encaixe=encaixe)
+
+    # --- Junção determinística: ordem da base e, dentro da linha, ordem das posições ---
+    df_resultado = pd.concat([df for df, _ in parciais], ignore_index=True)
+    df_resultado = df_resultado.sort_values("_linha", kind="stable", ignore_index=True)
+    if not incluir_linha:
+        df_resultado = df_resultado.drop(columns="_linha")
+    # Categorias de partições diferentes viram object no concat: recategoriza sobre o resultado completo
+    categorizar(df_resultado)
+    return df_resultado, sum(c for _, c in parciais)
@@ -0,0 +1,172 @@
+# simulador/perfil.py - cronometragem por etapa da simulação
+#
+# Cada etapa registra tempo, linhas processadas, vazão (linhas/s) e o pico de
+# memória (RSS) do processo durante a etapa. O progresso é repassado a um
+# callback (barra da página) e a execução pode ser anexada a um log JSONL
+# local, para acompanhar regressões entre versões e tamanhos de entrada.
+
+import datetime
+import json
+import os
+import platform
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+CAMINHO_LOG = os.path.join("logs", "simulacoes.jsonl")
+
+# Intervalo de amostragem da memória durante uma etapa (segundos)
+INTERVALO_AMOSTRAGEM = 0.01
+# Abaixo disso a vazão (linhas/s) não é significativa e fica em branco
+SEGUNDOS_MINIMOS_VAZAO = 0.001
+
+
+def memoria_rss():
+    """Memória residente atual do processo em bytes (None se não for possível medir)."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+
+def pico_memoria_rss():
+    """Maior memória residente do processo desde o início, em bytes (None se não for possível medir)."""
+    if resource is not None:
+        # ru_maxrss vem em KB no Linux e em bytes no macOS
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pico if sys.platform == "darwin" else pico * 1024
+    if psutil is not None:
+        return getattr(psutil.Process().memory_info(), "peak_wset", None)  # Windows
+    return None
+
+
+class _AmostradorMemoria(threading.Thread):
+    # Acompanha o maior RSS observado enquanto a etapa executa
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.pico = memoria_rss()
+        self._parar = threading.Event()
+
+    def run(self):
+        while not self._parar.wait(INTERVALO_AMOSTRAGEM):
+            self._observar()
+
+    def _observar(self):
+        atual = memoria_rss()
+        if atual is not None and (self.pico is None or atual > self.pico):
+            self.pico = atual
+
+    def parar(self):
+        self._parar.set()
+        self.join()
+        self._observar()
+        return self.pico
+
+
+class PerfilExecucao:
+    """Registro das etapas de uma execução.
+
+    `ao_progredir(fracao, texto)` é chamado no início e no fim de cada etapa; a fração
+    usa `etapas_previstas` (lista de nomes) quando informada.
+    """
+
+    def __init__(self, ao_progredir=None, etapas_previstas=None):
+        self.ao_progredir = ao_progredir
+        self.etapas_previstas = list(etapas_previstas or [])
+        self.etapas = []
+        self._inicio = time.perf_counter()
+
+    def _progredir(self, texto):
+        if self.ao_progredir is None:
+            return
+        total = max(len(self.etapas_previstas), len(self.etapas), 1)
+        self.ao_progredir(min(len(self.etapas) / total, 1.0), texto)
+
+    @contextmanager
+    def etapa(self, nome, linhas=None):
+        """Cronometra o bloco; as linhas podem ser informadas depois via registro["linhas"]."""
+        registro = {"etapa": nome, "linhas": linhas}
+        self._progredir(f"⏳ {nome}...")
+        amostrador = _AmostradorMemoria()
+        amostrador.start()
+        inicio = time.perf_counter()
+        try:
+            yield registro
+        finally:
+            segundos = time.perf_counter() - inicio
+            pico = amostrador.parar()
+            linhas = registro["linhas"]
+            registro["segundos"] = round(segundos, 4)
+            registro["linhas_por_segundo"] = round(linhas / segundos, 1) if linhas and segundos >= SEGUNDOS_MINIMOS_VAZAO else None
+            registro["pico_memoria_mb"] = round(pico / 1024 ** 2, 1) if pico is not None else None
+            self.etapas.append(registro)
+            self._progredir(f"✔️ {nome}")
+
+    @property
+    def segundos_total(self):
+        return time.perf_counter() - self._inicio
+
+    def registrar(self, caminho=CAMINHO_LOG, **extras):
+        """Anexa a execução ao log JSONL (uma linha por execução)."""
+        registro = {
+            "data": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "segundos_total": round(self.segundos_total, 4),
+            **extras,
+            "etapas": self.etapas
+        }
+        anexar_log(registro, caminho)
+        return registro
+
+
+def anexar_log(registro, caminho=CAMINHO_LOG):
+    try:
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        with open(caminho, "a", encoding="utf-8") as f:
+            f.write(json.dumps(registro, ensure_ascii=False, default=str) + "\n")
+    except OSError as e:
+        print(f"⚠️ Não foi possível gravar o log de execução: {e}")
+
+
+def tabela_etapas(etapas):
+    """DataFrame de exibição com as etapas registradas."""
+    return pd.DataFrame(etapas, columns=["etapa", "segundos", "linhas", "linhas_por_segundo", "pico_memoria_mb"]).rename(columns={
+        "etapa": "Etapa", "segundos": "Tempo (s)", "linhas": "Linhas",
+        "linhas_por_segundo": "Linhas/s", "pico_memoria_mb": "Pico de memória (MB)"
+    })
+
+
+def cronometrar_exportacao(gerar, arquivo, caminho=CAMINHO_LOG, **extras):
+    """Envolve um gerador de arquivo (callable sem argumentos) registrando tempo e tamanho no log."""
+    def gerar_cronometrado():
+        inicio = time.perf_counter()
+        dados = gerar()
+        anexar_log({
+            "data": datetime.datetime.now().isoformat(timespec="seconds"),
+            "tipo": "exportacao",
+            "arquivo": arquivo,
+            "segundos": round(time.perf_counter() - inicio, 4),
+            "bytes": len(dados),
+            **extras
+        }, caminho)
+        return dados
+    return gerar_cronometrado
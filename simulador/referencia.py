@@ -0,0 +1,320 @@
+# simulador/referencia.py - carga das tabelas de referência (tipos de bin e posições)
+#
+# O banco logistica.db só é sincronizado quando o conteúdo de um CSV muda, e
+# apenas as linhas novas, alteradas ou removidas são gravadas (hash por linha),
+# numa única transação; cada sincronização com alterações incrementa a versão
+# das referências, usada na invalidação dos caches. As tabelas têm esquema
+# tipado (chave primária em posição + tipo de depósito, índice em Tipo) e os
+# valores já são gravados normalizados. A tabela
+# capacidade_posicao materializa, por posição, a estrutura, a quantidade e o
+# volume das bins; a simulação consulta nela só as posições do arquivo enviado.
+# Os tipos de bin ficam num cache do processo, compartilhado entre as sessões
+# e os reruns do Streamlit.
+
+import datetime
+import hashlib
+import os
+import sqlite3
+import threading
+import uuid
+from typing import NamedTuple
+
+import pandas as pd
+
+PASTA_CSV = "arquivos"
+CAMINHO_BANCO = "logistica.db"
+ARQUIVOS_CSV = {
+    "info_tipo_bin": "info_tipo_bin.csv",
+    "info_posicao_bin": "info_posicao_bin.csv"
+}
+TABELA_CONTROLE = "controle_csv"
+TABELA_CAPACIDADE = "capacidade_posicao"
+TABELA_VERSAO = "versao_referencia"
+# Hash do conteúdo de cada linha, usado na sincronização incremental
+COLUNA_HASH = "_hash_linha"
+
+# Incrementar quando o esquema das tabelas mudar (força regravar o banco; PRAGMA user_version)
+VERSAO_ESQUEMA = 2
+
+# Esquema de cada tabela: colunas numéricas (REAL; as demais são TEXT), chave primária e índices
+ESQUEMAS = {
+    "info_tipo_bin": {
+        "numericas": ["Comprimento_(cm)", "Largura_(cm)", "Altura_(cm)", "Volume_(L)"],
+        "chave": ["Tipo"],
+        "indices": []
+    },
+    "info_posicao_bin": {
+        "numericas": ["Qtd._Caixas_BIN_ABASTECIMENTO"],
+        "chave": ["Posição_no_depósito", "Tipo_de_depósito"],
+        "indices": ["Tipo"]
+    }
+}
+
+# Posição -> estrutura, tipo, quantidade e volume das bins (já com o join em Tipo)
+SQL_CRIAR_CAPACIDADE = f"""
+    CREATE TABLE {TABELA_CAPACIDADE} (
+        "Posicao" TEXT NOT NULL,
+        "Tipo_de_depósito" TEXT NOT NULL,
+        "Estrutura" TEXT,
+        "Tipo" TEXT,
+        "Quantidade_Bin" REAL,
+        "Volume_max_L" REAL,
+        PRIMARY KEY ("Posicao", "Tipo_de_depósito")
+    ) WITHOUT ROWID
+"""
+SQL_PREENCHER_CAPACIDADE = f"""
+    INSERT INTO {TABELA_CAPACIDADE}
+    SELECT p."Posição_no_depósito", p."Tipo_de_depósito", p."Estrutura", p."Tipo",
+           p."Qtd._Caixas_BIN_ABASTECIMENTO", t."Volume_(L)"
+    FROM info_posicao_bin p
+    LEFT JOIN info_tipo_bin t ON t."Tipo" = p."Tipo"
+"""
+
+
+class Referencia(NamedTuple):
+    """Tipos de bin normalizados (somente leitura), a versão dos CSVs que os geraram e o banco de origem."""
+    df_tipo_bin: pd.DataFrame
+    versao: str
+    caminho_banco: str
+
+    def capacidade_posicoes(self, df_chaves):
+        """Estrutura, Tipo, Quantidade_Bin e Volume_max_L das posições de `df_chaves`
+        (colunas Posicao e Tipo_de_depósito), consultadas no banco por uma tabela temporária."""
+        chaves = df_chaves[["Posicao", "Tipo_de_depósito"]].dropna().drop_duplicates()
+        conn = sqlite3.connect(self.caminho_banco)
+        try:
+            conn.execute('CREATE TEMP TABLE posicoes_consulta ("Posicao" TEXT, "Tipo_de_depósito" TEXT, PRIMARY KEY ("Posicao", "Tipo_de_depósito")) WITHOUT ROWID')
+            conn.executemany("INSERT INTO temp.posicoes_consulta VALUES (?, ?)", chaves.astype(str).itertuples(index=False, name=None))
+            return pd.read_sql(
+                f'SELECT c.* FROM temp.posicoes_consulta q JOIN {TABELA_CAPACIDADE} c USING ("Posicao", "Tipo_de_depósito")', conn
+            )
+        finally:
+            conn.close()
+
+
+_trava = threading.Lock()
+_cache = {}
+
+
+def _hash_arquivo(caminho):
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def _ler_csv(tabela, caminho):
+    # Textos como texto (códigos com zeros à esquerda), numéricos convertidos explicitamente
+    df = pd.read_csv(caminho, sep=";", encoding="latin1", dtype=str)
+    df.columns = [c.strip().replace(" ", "_") for c in df.columns]
+
+    for col in ESQUEMAS[tabela]["numericas"]:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col].str.replace(",", ".", regex=False), errors="coerce")
+
+    # Ajuste específico para o volume da bin
+    if tabela == "info_tipo_bin" and "Volume_(L)" in df.columns:
+        df["Volume_(L)"] = df["Volume_(L)"].fillna(0)
+    if "Tipo" in df.columns:
+        df["Tipo"] = df["Tipo"].str.strip()
+    if "Tipo_de_depósito" in df.columns:
+        df["Tipo_de_depósito"] = df["Tipo_de_depósito"].str.strip().str.zfill(4)
+    return df
+
+
+def _hash_linhas(df):
+    # Hash de 64 bits do conteúdo de cada linha (INTEGER com sinal no SQLite)
+    return pd.util.hash_pandas_object(df, index=False).to_numpy().view("int64")
+
+
+def _criar_tabela(conn, tabela, colunas):
+    # Tabela com tipos, chave primária, índices e a coluna de hash das linhas
+    esquema = ESQUEMAS[tabela]
+    definicoes = ", ".join(
+        f'"{c}" {"REAL" if c in esquema["numericas"] else "TEXT"}{" NOT NULL" if c in esquema["chave"] else ""}'
+        for c in colunas
+    )
+    chave = ", ".join(f'"{c}"' for c in esquema["chave"])
+    conn.execute(f'CREATE TABLE "{tabela}" ({definicoes}, "{COLUNA_HASH}" INTEGER NOT NULL, PRIMARY KEY ({chave}))')
+    for col in esquema["indices"]:
+        conn.execute(f'CREATE INDEX "idx_{tabela}_{col}" ON "{tabela}" ("{col}")')
+
+
+def _sincronizar_tabela(conn, tabela, df):
+    """Grava só a diferença entre o CSV (`df`, já normalizado) e a tabela; retorna (inseridas, atualizadas, removidas)."""
+    chave = ESQUEMAS[tabela]["chave"]
+    duplicadas = df.duplicated(chave).sum()
+    if duplicadas:
+        raise ValueError(f"{tabela}: {duplicadas} linhas com chave repetida ({', '.join(chave)})")
+
+    df = df.assign(**{COLUNA_HASH: pd.array(_hash_linhas(df), dtype="Int64")})
+    colunas_banco = [r[1] for r in conn.execute(f'PRAGMA table_info("{tabela}")')]
+    if colunas_banco == list(df.columns):
+        colunas_consulta = ", ".join(f'"{c}"' for c in chave + [COLUNA_HASH])
+        atual = pd.read_sql(f'SELECT {colunas_consulta} FROM "{tabela}"', conn, dtype={COLUNA_HASH: "Int64"})
+    else:
+        # Tabela nova ou colunas do CSV diferentes das gravadas: recria a tabela
+        conn.execute(f'DROP TABLE IF EXISTS "{tabela}"')
+        _criar_tabela(conn, tabela, list(df.columns[:-1]))
+        atual = pd.DataFrame({c: pd.Series(dtype=object) for c in chave}).assign(**{COLUNA_HASH: pd.array([], dtype="Int64")})
+
+    comparacao = df[chave + [COLUNA_HASH]].astype({c: object for c in chave}).merge(
+        atual.astype({c: object for c in chave}), on=chave, how="outer", suffixes=("", "_banco"), indicator=True
+    )
+    removidas = comparacao.loc[comparacao["_merge"] == "right_only", chave]
+    novas = comparacao["_merge"] == "left_only"
+    alteradas = (comparacao["_merge"] == "both") & (comparacao[COLUNA_HASH] != comparacao[f"{COLUNA_HASH}_banco"])
+    gravar = comparacao.loc[novas | alteradas, chave].merge(df, on=chave, how="inner")
+
+    condicao = " AND ".join(f'"{c}" = ?' for c in chave)
+    conn.executemany(f'DELETE FROM "{tabela}" WHERE {condicao}', removidas.itertuples(index=False, name=None))
+    if len(gravar):
+        colunas = ", ".join(f'"{c}"' for c in df.columns)
+        marcadores = ", ".join("?" for _ in df.columns)
+        valores = gravar[df.columns].astype(object)
+        conn.executemany(
+            f'INSERT OR REPLACE INTO "{tabela}" ({colunas}) VALUES ({marcadores})',
+            valores.where(valores.notna(), None).itertuples(index=False, name=None)
+        )
+    return int(novas.sum()), int(alteradas.sum()), len(removidas)
+
+
+def _versao(conn):
+    # Identificador do banco + número da versão (o identificador evita colisões se o banco for recriado)
+    id_banco, numero = conn.execute(f"SELECT id_banco, numero FROM {TABELA_VERSAO}").fetchone()
+    return f"{id_banco[:8]}.{numero}"
+
+
+def _assinatura(pasta_csv):
+    # Identifica o estado atual dos CSVs sem ler o conteúdo
+    assinatura = []
+    for nome_arquivo in ARQUIVOS_CSV.values():
+        caminho = os.path.join(pasta_csv, nome_arquivo)
+        if os.path.exists(caminho):
+            info = os.stat(caminho)
+            assinatura.append((nome_arquivo, info.st_mtime_ns, info.st_size))
+        else:
+            assinatura.append((nome_arquivo, None, None))
+    return tuple(assinatura)
+
+
+def sincronizar_banco(caminho_banco=CAMINHO_BANCO, pasta_csv=PASTA_CSV):
+    """Sincroniza no SQLite as tabelas cujo CSV mudou (data de modificação e hash do conteúdo),
+    gravando só as linhas inseridas, atualizadas ou removidas, numa única transação.
+
+    Retorna (versão das referências, {tabela: (inseridas, atualizadas, removidas)}).
+    """
+    conn = sqlite3.connect(caminho_banco, isolation_level=None)
+    try:
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {TABELA_CONTROLE} "
+            "(arquivo TEXT PRIMARY KEY, mtime_ns INTEGER, tamanho INTEGER, hash TEXT)"
+        )
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {TABELA_VERSAO} (id_banco TEXT NOT NULL, numero INTEGER NOT NULL, atualizado_em TEXT)")
+        if conn.execute(f"SELECT COUNT(*) FROM {TABELA_VERSAO}").fetchone()[0] == 0:
+            conn.execute(f"INSERT INTO {TABELA_VERSAO} VALUES (?, 0, NULL)", (uuid.uuid4().hex,))
+
+        tabelas_existentes = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        # Banco de uma versão anterior do esquema (ex.: tabelas sem tipos ou sem hash): regrava tudo
+        esquema_atual = conn.execute("PRAGMA user_version").fetchone()[0] == VERSAO_ESQUEMA
+
+        pendentes = {}
+        controles = []
+        for tabela, nome_arquivo in ARQUIVOS_CSV.items():
+            caminho = os.path.join(pasta_csv, nome_arquivo)
+            if not os.path.exists(caminho):
+                print(f"⚠️ Arquivo não encontrado: {nome_arquivo}")
+                continue
+
+            info = os.stat(caminho)
+            controle = conn.execute(
+                f"SELECT mtime_ns, tamanho, hash FROM {TABELA_CONTROLE} WHERE arquivo = ?", (nome_arquivo,)
+            ).fetchone()
+
+            # Mesma data de modificação e tamanho: nada a fazer
+            if esquema_atual and tabela in tabelas_existentes and controle and controle[:2] == (info.st_mtime_ns, info.st_size):
+                continue
+
+            hash_csv = _hash_arquivo(caminho)
+            if not esquema_atual or tabela not in tabelas_existentes or not controle or controle[2] != hash_csv:
+                try:
+                    pendentes[tabela] = _ler_csv(tabela, caminho)
+                except Exception as e:
+                    print(f"❌ Erro ao processar {nome_arquivo}: {e}")
+                    continue
+            # Conteúdo igual (arquivo apenas tocado) ou sincronizado agora: registra o novo estado
+            controles.append((nome_arquivo, info.st_mtime_ns, info.st_size, hash_csv))
+
+        alteracoes = {}
+        conn.execute("BEGIN")
+        try:
+            if not esquema_atual:
+                for tabela in list(ARQUIVOS_CSV) + [TABELA_CAPACIDADE]:
+                    conn.execute(f'DROP TABLE IF EXISTS "{tabela}"')
+            for tabela, df in pendentes.items():
+                alteracoes[tabela] = _sincronizar_tabela(conn, tabela, df)
+                print(f"🔄 {tabela}: {alteracoes[tabela][0]} inseridas, {alteracoes[tabela][1]} atualizadas, {alteracoes[tabela][2]} removidas")
+
+            houve_alteracao = any(sum(contagem) for contagem in alteracoes.values())
+            # --- Capacidade por posição, materializada a partir das duas tabelas ---
+            if houve_alteracao or not esquema_atual or TABELA_CAPACIDADE not in tabelas_existentes:
+                conn.execute(f"DROP TABLE IF EXISTS {TABELA_CAPACIDADE}")
+                conn.execute(SQL_CRIAR_CAPACIDADE)
+                conn.execute(SQL_PREENCHER_CAPACIDADE)
+            if houve_alteracao:
+                conn.execute(
+                    f"UPDATE {TABELA_VERSAO} SET numero = numero + 1, atualizado_em = ?",
+                    (datetime.datetime.now().isoformat(timespec="seconds"),)
+                )
+            conn.executemany(
+                f"INSERT OR REPLACE INTO {TABELA_CONTROLE} (arquivo, mtime_ns, tamanho, hash) VALUES (?, ?, ?, ?)", controles
+            )
+            if not esquema_atual and set(pendentes) == set(ARQUIVOS_CSV):
+                conn.execute(f"PRAGMA user_version = {VERSAO_ESQUEMA}")
+            conn.execute("COMMIT")
+        except Exception as e:
+            conn.execute("ROLLBACK")
+            print(f"❌ Erro ao sincronizar as referências (nenhuma alteração gravada): {e}")
+            alteracoes = {}
+
+        versao = _versao(conn)
+    finally:
+        conn.close()
+
+    return versao, alteracoes
+
+
+def atualizar_banco(caminho_banco=CAMINHO_BANCO, pasta_csv=PASTA_CSV):
+    """Sincroniza o banco com os CSVs (ver sincronizar_banco) e retorna a versão das referências."""
+    versao, _ = sincronizar_banco(caminho_banco, pasta_csv)
+    return versao
+
+
+def _ler_referencia(caminho_banco, versao):
+    conn = sqlite3.connect(caminho_banco)
+    try:
+        df_tipo_bin = pd.read_sql('SELECT * FROM info_tipo_bin', conn)
+    finally:
+        conn.close()
+
+    df_tipo_bin = df_tipo_bin.drop(columns=COLUNA_HASH).rename(columns={"Volume_(L)": "Volume_max_L"})
+    return Referencia(df_tipo_bin, versao, os.path.abspath(caminho_banco))
+
+
+def carregar_referencia(caminho_banco=CAMINHO_BANCO, pasta_csv=PASTA_CSV):
+    """Retorna as referências do cache do processo, atualizando o banco só se os CSVs mudaram.
+
+    As posições não são carregadas aqui: cada simulação consulta só as suas
+    (Referencia.capacidade_posicoes). Os DataFrames são compartilhados entre sessões:
+    não devem ser alterados no lugar.
+    """
+    chave = (os.path.abspath(caminho_banco), _assinatura(pasta_csv))
+    with _trava:
+        referencia = _cache.get(chave)
+        if referencia is None:
+            versao = atualizar_banco(caminho_banco, pasta_csv)
+            referencia = _ler_referencia(caminho_banco, versao)
+            _cache.clear()
+            _cache[chave] = referencia
+    return referencia
@@ -0,0 +1,170 @@
+# simulador/resumos.py - agregação hierárquica dos relatórios resumidos
+#
+# Um único groupby sobre o resultado tipado gera o nível produto/posição; os
+# níveis posição e estrutura saem desse rollup (tabelas pequenas). As descrições
+# entram por dicionários de consulta, sem merges largos nem cópias do detalhado.
+# Com várias ondas no detalhado (coluna "Onda"), os resumos acima são os
+# consolidados e o resumo por onda aplica a regra de posições a cada onda.
+
+import numpy as np
+import pandas as pd
+
+from simulador.motor import STATUS_OK, CATEGORIAS_STATUS, COLUNA_ONDA
+
+CHAVES_PRODUTO_POSICAO = ["Estrutura", "Posicao", "Produto", "Tipo_Bin"]
+
+COLUNAS_RESUMO_PRODUTO = [
+    "Estrutura", "Descrição - estrutura", "Posição", "Produto", "Descrição – produto", "Tipo_Bin",
+    "Bins_Necessarias", "Bins_Disponiveis", "Quantidade Total", "Volume Total", "Volumetria Máxima",
+    "Diferença", "Status"
+]
+
+
+def descricoes_estrutura(df_posicoes_prod):
+    """(Posição, Tipo_de_depósito) -> descrição da estrutura, das posições do arquivo já unidas à capacidade."""
+    df = df_posicoes_prod[["Posicao", "Tipo_de_depósito", "Estrutura"]].drop_duplicates(["Posicao", "Tipo_de_depósito"])
+    return dict(zip(zip(df["Posicao"], df["Tipo_de_depósito"]), df["Estrutura"]))
+
+
+def descricoes_produto(df_posicoes_prod):
+    """Produto -> descrição breve (primeira ocorrência na aba info_posicao_produtos)."""
+    df = df_posicoes_prod[["Produto", "Descrição breve do produto"]].drop_duplicates("Produto")
+    return dict(zip(df["Produto"], df["Descrição breve do produto"]))
+
+
+def _descrever(df, desc_estrutura, desc_produto):
+    # Anexa as descrições a uma tabela pequena (agregada ou só as linhas com erro)
+    df.insert(1, "Descrição - estrutura", [desc_estrutura.get(chave) for chave in zip(df["Posicao"], df["Estrutura"])])
+    df.insert(4, "Descrição – produto", [desc_produto.get(p) for p in df["Produto"]])
+    return df.rename(columns={"Posicao": "Posição"})
+
+
+def agregar_produto_posicao(df_resultado, contar_linhas=False):
+    """Nível base do rollup: uma linha por (Estrutura, Posição, Produto, Tipo_Bin) das linhas OK,
+    na ordem de primeira ocorrência no detalhado. Com `contar_linhas`, inclui "_linhas"
+    (linhas do detalhado em cada grupo), usada na atualização incremental."""
+    agregacoes = {
+        "Bins_Necessarias": ("Bins_Necessarias", "sum"),
+        "Bins_Disponiveis": ("Bins_Disponiveis", "first"),
+        "Quantidade_Total": ("Quantidade_Total", "sum"),
+        "Volume_Total": ("Volume_Total", "sum"),
+        "Volumetria_Maxima": ("Volumetria_Máxima", "sum")
+    }
+    if contar_linhas:
+        agregacoes["_linhas"] = ("Status", "size")
+    agrupado = df_resultado.groupby(["Status"] + CHAVES_PRODUTO_POSICAO, observed=True, sort=False).agg(**agregacoes).reset_index()
+    agrupado = agrupado[(agrupado["Status"] == STATUS_OK).to_numpy()].drop(columns="Status")
+    return agrupado.reset_index(drop=True)
+
+
+def resumir(df_resultado, df_posicoes_prod, nivel_produto=None):
+    """Gera o resumo por produto/estrutura, o resumo de posições OK/Não Atende e o resumo geral.
+
+    `nivel_produto` (de agregar_produto_posicao, já atualizado) evita reagrupar o detalhado.
+    """
+    desc_estrutura = descricoes_estrutura(df_posicoes_prod)
+    desc_produto = descricoes_produto(df_posicoes_prod)
+
+    # --- Rollup: produto/posição ---
+    if nivel_produto is None:
+        nivel_produto = agregar_produto_posicao(df_resultado)
+    nivel_produto = _descrever(nivel_produto.drop(columns="_linhas", errors="ignore"), desc_estrutura, desc_produto)
+    nivel_produto = nivel_produto.rename(columns={
+        "Quantidade_Total": "Quantidade Total", "Volume_Total": "Volume Total", "Volumetria_Maxima": "Volumetria Máxima"
+    })
+
+    # --- Resumo por Produto e Estrutura (linhas sem descrição ficam de fora, como no agrupamento original) ---
+    resumo_produto = nivel_produto.dropna(subset=["Descrição - estrutura", "Descrição – produto"])
+    resumo_produto = resumo_produto.sort_values(
+        ["Estrutura", "Descrição - estrutura", "Posição", "Produto", "Descrição – produto", "Tipo_Bin"],
+        kind="stable", ignore_index=True
+    )
+    resumo_produto["Volume Total"] = resumo_produto["Volume Total"].round(2)
+    resumo_produto["Volumetria Máxima"] = resumo_produto["Volumetria Máxima"].round(2)
+    resumo_produto["Diferença"] = resumo_produto["Bins_Disponiveis"] - resumo_produto["Bins_Necessarias"]
+    resumo_produto["Status"] = pd.Categorical([STATUS_OK] * len(resumo_produto), categories=CATEGORIAS_STATUS)
+
+    # Linhas com erro entram no fim, na ordem do detalhado
+    df_erros = df_resultado[(df_resultado["Status"] != STATUS_OK).to_numpy()]
+    df_erros = _descrever(df_erros.drop(columns="Recebedor"), desc_estrutura, desc_produto).rename(columns={
+        "Quantidade_Total": "Quantidade Total", "Volume_Total": "Volume Total", "Volumetria_Máxima": "Volumetria Máxima"
+    })
+    df_resumo_agrupado = pd.concat([resumo_produto, df_erros[COLUNAS_RESUMO_PRODUTO]], ignore_index=True)
+
+    # --- Rollup: posição (disponível = primeira ocorrência no detalhado) ---
+    nivel_posicao = nivel_produto.groupby(["Posição", "Descrição - estrutura"], observed=True).agg(
+        Bins_Necessarias=("Bins_Necessarias", "sum"),
+        Bins_Disponiveis=("Bins_Disponiveis", "first")
+    ).reset_index()
+    atende = (nivel_posicao["Bins_Disponiveis"] >= nivel_posicao["Bins_Necessarias"]).to_numpy(dtype=bool, na_value=False)
+    nivel_posicao["Status"] = np.where(atende, "OK", "Não Atende")
+
+    # --- Rollup: estrutura ---
+    resumo_nao_atendem = nivel_posicao[~atende].groupby("Descrição - estrutura")["Posição"].nunique().reset_index(name="Posições - Não Atendem")
+    resumo_ok = nivel_posicao[atende].groupby("Descrição - estrutura")["Posição"].nunique().reset_index(name="Posições - OK")
+
+    resumo_geral = resumo_produto.groupby("Descrição - estrutura", as_index=False).agg({
+        "Bins_Necessarias": "sum",
+        "Bins_Disponiveis": "sum",
+        "Diferença": "sum",
+        "Quantidade Total": "sum",
+        "Volume Total": "sum",
+        "Volumetria Máxima": "sum"
+    })
+
+    # Renomeia colunas para exibição
+    resumo_geral.columns = [
+        "Descrição - estrutura",
+        "Total Bins Necessárias",
+        "Total Bins Disponíveis",
+        "Total Diferença",
+        "Total Quantidade Total",
+        "Total Volume Total",
+        "Total Volumetria Máxima"
+    ]
+
+    resumos = {
+        "df_resumo_agrupado": df_resumo_agrupado,
+        "resumo_nao_atendem": resumo_nao_atendem,
+        "resumo_ok": resumo_ok,
+        "resumo_geral": resumo_geral
+    }
+    if COLUNA_ONDA in df_resultado.columns:
+        resumos["resumo_ondas"] = resumir_ondas(df_resultado, desc_estrutura)
+    return resumos
+
+
+def resumir_ondas(df_resultado, desc_estrutura):
+    """Por onda e estrutura: posições OK / Não Atende (só com a demanda da onda), bins e volume.
+
+    "Total Bins Excedentes" vem da alocação sobre todas as ondas juntas: as bins de
+    cada onda que não couberam no que as anteriores (na ordem de prioridade) deixaram.
+    """
+    ok = df_resultado[(df_resultado["Status"] == STATUS_OK).to_numpy()]
+    somas = {
+        "Bins_Necessarias": ("Bins_Necessarias", "sum"),
+        "Bins_Excedentes": ("Bins_Excedentes", "sum"),
+        "Volume_Total": ("Volume_Total", "sum")
+    }
+    # --- Onda/posição (disponível = primeira ocorrência no detalhado, como no resumo de posições) ---
+    nivel = ok.groupby([COLUNA_ONDA, "Estrutura", "Posicao"], observed=True, sort=False).agg(
+        Bins_Disponiveis=("Bins_Disponiveis", "first"), **somas
+    ).reset_index()
+    nivel["Descrição - estrutura"] = [desc_estrutura.get(chave) for chave in zip(nivel["Posicao"], nivel["Estrutura"])]
+    nivel_posicao = nivel.groupby([COLUNA_ONDA, "Posicao", "Descrição - estrutura"], observed=True, sort=False).agg(
+        Bins_Disponiveis=("Bins_Disponiveis", "first"), **{col: (col, "sum") for col in somas}
+    ).reset_index()
+    atende = (nivel_posicao["Bins_Disponiveis"] >= nivel_posicao["Bins_Necessarias"]).to_numpy(dtype=bool, na_value=False)
+    nivel_posicao["_ok"] = atende
+    nivel_posicao["_nao_atende"] = ~atende
+
+    # --- Onda/estrutura ---
+    resumo = nivel_posicao.groupby([COLUNA_ONDA, "Descrição - estrutura"], observed=True).agg(**{
+        "Posições - OK": ("_ok", "sum"),
+        "Posições - Não Atendem": ("_nao_atende", "sum"),
+        "Total Bins Necessárias": ("Bins_Necessarias", "sum"),
+        "Total Bins Excedentes": ("Bins_Excedentes", "sum"),
+        "Total Volume Total": ("Volume_Total", "sum")
+    }).reset_index()
+    resumo["Total Volume Total"] = resumo["Total Volume Total"].round(2)
+    return resumo
@@ -0,0 +1,126 @@
+# simulador/simulacao.py - pipeline completo da simulação, sem dependência do Streamlit
+#
+# Usado pela página (app_simulador_bin.py) e pelo processamento em lote
+# (simular_lote.py); pode ser chamado de agendadores, testes ou profilers.
+
+import time
+import datetime
+
+import pandas as pd
+
+from simulador.alocacao import alocar, PRIORIDADE_ONDA
+from simulador.encaixe import dimensoes_produto, tabela_encaixe
+from simulador.motor import calcular_bins
+from simulador.particionamento import calcular_bins_particionado
+from simulador.perfil import PerfilExecucao
+from simulador.referencia import carregar_referencia
+from simulador.resumos import resumir
+
+ABA_BASE = "base_item_pacotes"
+ABA_POSICOES = "info_posicao_produtos"
+
+# Etapas cronometradas por simular(), na ordem de execução
+ETAPAS_SIMULACAO = ["Validação de colunas", "Tabelas de referência", "Normalização da base", "Junção de posições", "Encaixe por dimensões", "Cálculo de bins", "Alocação por posição", "Resumos"]
+
+COLUNAS_OBRIGATORIAS_BASE = ["Produto", "Qtd.solicitada total", "Recebedor mercadoria", "Peso", "UM peso", "Volume", "UM volume", "Área de atividade"]
+COLUNAS_OBRIGATORIAS_POS = ["Posição no depósito", "Tipo de depósito", "Área armazmto", "Produto"]
+
+
+def colunas_ausentes(df_base, df_posicoes_prod):
+    """Lista as mensagens de colunas obrigatórias ausentes nas duas abas (vazia se estiver tudo certo)."""
+    erros = [f"Coluna obrigatória ausente na {ABA_BASE}: {col}" for col in COLUNAS_OBRIGATORIAS_BASE if col not in df_base.columns]
+    erros += [f"Coluna obrigatória ausente na {ABA_POSICOES}: {col}" for col in COLUNAS_OBRIGATORIAS_POS if col not in df_posicoes_prod.columns]
+    return erros
+
+
+def preparar_base(df_base):
+    # --- Normalizações e ajustes na base ---
+    df_base = df_base.copy()
+    df_base["Recebedor mercadoria"] = df_base["Recebedor mercadoria"].astype(str).str.zfill(5)
+    df_base["Tipo_de_depósito"] = df_base["Área de atividade"].astype(str).str[:2].str.zfill(4)
+    df_base["Peso"] = pd.to_numeric(df_base["Peso"], errors="coerce").fillna(0)
+    df_base["Volume"] = pd.to_numeric(df_base["Volume"], errors="coerce").fillna(0)
+    df_base["Qtd.solicitada total"] = pd.to_numeric(df_base["Qtd.solicitada total"], errors="coerce").fillna(1)
+    df_base.loc[df_base["UM peso"] == "G", "Peso"] /= 1000
+    df_base.loc[df_base["UM volume"] == "ML", "Volume"] /= 1000
+    df_base["Volume unitário (L)"] = df_base["Volume"] / df_base["Qtd.solicitada total"]
+    return df_base
+
+
+def preparar_posicoes(df_posicoes_prod, referencia):
+    df_posicoes_prod = df_posicoes_prod.rename(columns={"Posição no depósito": "Posicao", "Tipo de depósito": "Tipo_de_depósito"})
+    df_posicoes_prod["Tipo_de_depósito"] = df_posicoes_prod["Tipo_de_depósito"].astype(str).str.zfill(4).str.strip()
+
+    # --- Junta a capacidade (estrutura, tipo, quantidade e volume das bins) só das posições do arquivo ---
+    df_capacidade = referencia.capacidade_posicoes(df_posicoes_prod)
+    df_posicoes_prod = df_posicoes_prod.merge(df_capacidade, on=["Posicao", "Tipo_de_depósito"], how="left")
+    return df_posicoes_prod
+
+
+def preparar_encaixe(df_base, referencia):
+    # Unidades por bin de cada (Produto, Tipo de bin) com dimensões, calculadas uma vez por base
+    return tabela_encaixe(dimensoes_produto(df_base), referencia.df_tipo_bin)
+
+
+def simular(df_base, df_posicoes_prod, referencia=None, workers=1, perfil=None, prioridade=PRIORIDADE_ONDA, encaixe_dimensoes=False):
+    """Executa a simulação completa a partir das duas abas do arquivo (DataFrames brutos).
+
+    Com `workers` > 1 o cálculo é particionado por produto e executado num pool de processos
+    (resultado idêntico ao de um único processo). Cada etapa é cronometrada em `perfil`
+    (um PerfilExecucao; criado aqui se não for informado). A capacidade de cada posição é
+    alocada entre as linhas na ordem de `prioridade` (ver simulador.alocacao). Com
+    `encaixe_dimensoes`, as bins dos produtos com dimensões na base saem das unidades que
+    cabem em cada tipo de bin (ver simulador.encaixe), e não do volume.
+
+    Retorna um dict com "tabelas" (df_resultado, df_resumo_agrupado, resumo_nao_atendem,
+    resumo_ok, resumo_geral) e "indicadores" (tempo, total de linhas, linhas sem erro, etapas).
+    Levanta ValueError se faltarem colunas obrigatórias.
+    """
+    inicio_tempo = time.time()
+    if perfil is None:
+        perfil = PerfilExecucao()
+
+    with perfil.etapa("Validação de colunas", len(df_base)):
+        erros = colunas_ausentes(df_base, df_posicoes_prod)
+        if erros:
+            raise ValueError("; ".join(erros))
+
+    with perfil.etapa("Tabelas de referência") as etapa:
+        if referencia is None:
+            referencia = carregar_referencia()
+        etapa["linhas"] = len(referencia.df_tipo_bin)
+
+    with perfil.etapa("Normalização da base", len(df_base)):
+        df_base = preparar_base(df_base)
+
+    with perfil.etapa("Junção de posições", len(df_posicoes_prod)):
+        df_posicoes_prod = preparar_posicoes(df_posicoes_prod, referencia)
+
+    with perfil.etapa("Encaixe por dimensões") as etapa:
+        encaixe = preparar_encaixe(df_base, referencia) if encaixe_dimensoes else None
+        etapa["linhas"] = len(encaixe.produtos) if encaixe is not None else 0
+
+    # --- Cálculo de bins por produto (motor vetorizado, opcionalmente particionado) ---
+    with perfil.etapa("Cálculo de bins", len(df_base)):
+        if workers and workers > 1:
+            df_resultado, contador_sucesso = calcular_bins_particionado(df_base, df_posicoes_prod, workers, encaixe=encaixe)
+        else:
+            df_resultado, contador_sucesso = calcular_bins(df_base, df_posicoes_prod, encaixe=encaixe)
+
+    with perfil.etapa("Alocação por posição", len(df_resultado)):
+        alocar(df_resultado, prioridade)
+
+    with perfil.etapa("Resumos", len(df_resultado)):
+        tabelas = {"df_resultado": df_resultado}
+        tabelas.update(resumir(df_resultado, df_posicoes_prod))
+
+    tempo_total = time.time() - inicio_tempo
+    return {
+        "tabelas": tabelas,
+        "indicadores": {
+            "tempo_formatado": str(datetime.timedelta(seconds=int(tempo_total))),
+            "total_linhas_base": len(df_base),
+            "contador_sucesso": contador_sucesso,
+            "etapas": perfil.etapas
+        }
+    }
@@ -0,0 +1,220 @@
+# simulador/tarefas.py - execução das simulações em segundo plano
+#
+# A página envia cada simulação como uma tarefa para uma fila limitada, atendida
+# por um conjunto fixo de threads; o script do Streamlit só consulta a situação
+# da tarefa (status e progresso) e termina, sem ficar preso ao cálculo. Os
+# resultados vão para um CacheResultados compartilhado (memória + Parquet em
+# disco), pela mesma chave usada na página: fechar a aba não perde uma
+# simulação concluída, e outros usuários podem simular ao mesmo tempo. Uma
+# tarefa pode levar vários arquivos (ondas), simulados como uma única base.
+
+import datetime
+import hashlib
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from simulador.alocacao import PRIORIDADE_ONDA
+from simulador.cache_resultados import CacheResultados, chave_resultado
+from simulador.incremental import simular_incremental, ETAPAS_INCREMENTAL
+from simulador.leitura import PlanilhaInvalida
+from simulador.ondas import conteudo_ondas, ler_ondas
+from simulador.perfil import PerfilExecucao, CAMINHO_LOG
+from simulador.referencia import carregar_referencia
+
+STATUS_NA_FILA = "Na fila"
+STATUS_EXECUTANDO = "Executando"
+STATUS_CONCLUIDA = "Concluída"
+STATUS_ERRO = "Erro"
+STATUS_ATIVOS = (STATUS_NA_FILA, STATUS_EXECUTANDO)
+
+LIMITE_MEMORIA_ENTRADAS = 256 * 1024 ** 2
+# Tarefas finalizadas mantidas na lista (os resultados ficam no cache)
+TAREFAS_GUARDADAS = 100
+
+
+def chave_estado(arquivos):
+    """Chave do estado da re-simulação incremental: os nomes dos arquivos enviados.
+
+    Cada arquivo (ou conjunto de ondas) reaproveita a sua própria última simulação,
+    sem que simulações de outros arquivos, de outros usuários, a substituam.
+    """
+    return hashlib.sha256("\0".join(nome for nome, _ in arquivos).encode()).hexdigest()
+
+
+class FilaCheia(RuntimeError):
+    """A fila de simulações atingiu o limite; tentar de novo mais tarde."""
+
+
+class Tarefa:
+    """Uma simulação enviada ao executor; atualizada pela thread que a executa.
+
+    `arquivos`: lista de (nome, bytes); com mais de um, cada arquivo é uma onda.
+    """
+
+    def __init__(self, arquivos, chave, prioridade=PRIORIDADE_ONDA, encaixe_dimensoes=False):
+        self.id = uuid.uuid4().hex
+        self.arquivo = ", ".join(nome for nome, _ in arquivos)
+        self.chave = chave
+        self.chave_estado = chave_estado(arquivos)
+        self.prioridade = prioridade
+        self.encaixe_dimensoes = encaixe_dimensoes
+        self.status = STATUS_NA_FILA
+        self.progresso = 0.0
+        self.texto = "⏳ Aguardando na fila..."
+        self.erros = []
+        self.criada = datetime.datetime.now()
+        self.iniciada = None
+        self.concluida = None
+        self._arquivos = arquivos
+
+    @property
+    def ativa(self):
+        return self.status in STATUS_ATIVOS
+
+    def situacao(self):
+        """Resumo da tarefa para exibição."""
+        return {
+            "Arquivo": self.arquivo,
+            "Prioridade": self.prioridade,
+            "Encaixe": "Dimensões" if self.encaixe_dimensoes else "Volume",
+            "Status": self.status,
+            "Progresso": round(self.progresso * 100),
+            "Enviada": self.criada.strftime("%d/%m %H:%M:%S"),
+            "Duração (s)": round(((self.concluida or datetime.datetime.now()) - self.iniciada).total_seconds(), 1) if self.iniciada else None
+        }
+
+
+class ExecutorSimulacoes:
+    """Fila limitada de simulações atendida por `workers` threads.
+
+    `resultados`, `entradas` e `estado` são os caches compartilhados por todas as
+    sessões: resultados por chave do arquivo, abas já lidas e a última simulação de
+    cada nome de arquivo (base da re-simulação incremental, ver chave_estado; em
+    memória só a mais recente, as demais em `pasta_estado`). `workers_calculo` > 1 particiona o cálculo
+    de cada tarefa por produto num pool de processos; `workers_leitura` limita os
+    processos que leem os arquivos de uma tarefa com várias ondas (padrão: um por CPU).
+    """
+
+    def __init__(self, workers=2, limite_fila=8, pasta_resultados=None, pasta_entradas=None, pasta_estado=None,
+                 workers_calculo=1, caminho_log=CAMINHO_LOG, workers_leitura=None):
+        self.resultados = CacheResultados(pasta=pasta_resultados)
+        self.entradas = CacheResultados(limite_bytes=LIMITE_MEMORIA_ENTRADAS, pasta=pasta_entradas)
+        self.estado = CacheResultados(limite_bytes=0, pasta=pasta_estado)
+        self.workers_calculo = workers_calculo
+        self.workers_leitura = workers_leitura
+        self.caminho_log = caminho_log
+        self._fila = queue.Queue(maxsize=limite_fila)
+        self._tarefas = OrderedDict()
+        self._trava = threading.Lock()
+        self._threads = [threading.Thread(target=self._atender, daemon=True, name=f"simulacao-{i}") for i in range(max(1, workers))]
+        for thread in self._threads:
+            thread.start()
+
+    # --- Envio e consulta ---
+    def enviar_ondas(self, arquivos, referencia=None, prioridade=PRIORIDADE_ONDA, encaixe_dimensoes=False):
+        """Enfileira a simulação de um ou mais arquivos [(nome, bytes)], juntos numa única base; retorna a Tarefa.
+
+        O resultado fica no cache com a chave
+        chave_resultado(conteudo_ondas(arquivos), versão, prioridade, encaixe_dimensoes);
+        os mesmos arquivos já na fila ou em execução devolvem a mesma tarefa.
+        Levanta FilaCheia se a fila estiver no limite.
+        """
+        if referencia is None:
+            referencia = carregar_referencia()
+        chave = chave_resultado(conteudo_ondas(arquivos), referencia.versao, prioridade, encaixe_dimensoes)
+        with self._trava:
+            existente = self._ativa_da_chave(chave)
+            if existente is not None:
+                return existente
+            tarefa = Tarefa(arquivos, chave, prioridade, encaixe_dimensoes)
+            try:
+                self._fila.put_nowait(tarefa)
+            except queue.Full:
+                raise FilaCheia(f"Há {self._fila.qsize()} simulações na fila; tente novamente em instantes.") from None
+            self._tarefas[tarefa.id] = tarefa
+            self._descartar_antigas()
+        return tarefa
+
+    def tarefa(self, id_tarefa):
+        with self._trava:
+            return self._tarefas.get(id_tarefa)
+
+    def tarefa_da_chave(self, chave):
+        """Tarefa mais recente do arquivo (chave do resultado), ativa ou não; None se não houver."""
+        with self._trava:
+            for tarefa in reversed(self._tarefas.values()):
+                if tarefa.chave == chave:
+                    return tarefa
+        return None
+
+    def tarefas(self):
+        """Todas as tarefas guardadas, da mais recente para a mais antiga."""
+        with self._trava:
+            return list(reversed(self._tarefas.values()))
+
+    def _ativa_da_chave(self, chave):
+        for tarefa in self._tarefas.values():
+            if tarefa.chave == chave and tarefa.ativa:
+                return tarefa
+        return None
+
+    def _descartar_antigas(self):
+        finalizadas = [id_tarefa for id_tarefa, t in self._tarefas.items() if not t.ativa]
+        for id_tarefa in finalizadas[:max(0, len(self._tarefas) - TAREFAS_GUARDADAS)]:
+            del self._tarefas[id_tarefa]
+
+    # --- Execução ---
+    def _atender(self):
+        while True:
+            tarefa = self._fila.get()
+            try:
+                self._executar(tarefa)
+            finally:
+                self._fila.task_done()
+
+    def _progredir(self, tarefa, fracao, texto):
+        tarefa.progresso = fracao
+        tarefa.texto = texto
+
+    def _executar(self, tarefa):
+        tarefa.status = STATUS_EXECUTANDO
+        tarefa.iniciada = datetime.datetime.now()
+        inicio_tempo = time.time()
+        perfil = PerfilExecucao(
+            ao_progredir=lambda fracao, texto: self._progredir(tarefa, fracao, texto),
+            etapas_previstas=["Leitura do Excel"] + ETAPAS_INCREMENTAL
+        )
+        try:
+            referencia = carregar_referencia()
+            with perfil.etapa("Leitura do Excel") as etapa:
+                df_base, df_posicoes_prod = ler_ondas(tarefa._arquivos, workers=self.workers_leitura, cache=self.entradas)
+                etapa["linhas"] = len(df_base)
+
+            # Só as linhas novas ou alteradas desde a última simulação do mesmo arquivo são recalculadas
+            resultado, estado = simular_incremental(df_base, df_posicoes_prod, self.estado.obter(tarefa.chave_estado), referencia,
+                                                    workers=self.workers_calculo, perfil=perfil, prioridade=tarefa.prioridade,
+                                                    encaixe_dimensoes=tarefa.encaixe_dimensoes)
+            self.estado.guardar(tarefa.chave_estado, estado)
+
+            # Tempo total da simulação, incluindo a leitura do arquivo
+            tempo_total = time.time() - inicio_tempo
+            resultado["indicadores"]["tempo_formatado"] = str(datetime.timedelta(seconds=int(tempo_total)))
+            self.resultados.guardar(tarefa.chave, resultado)
+
+            # Histórico local de execuções, para acompanhar regressões de desempenho
+            if self.caminho_log:
+                perfil.registrar(self.caminho_log, origem="app", arquivo=tarefa.arquivo, linhas_base=len(df_base), workers=self.workers_calculo)
+            tarefa.status = STATUS_CONCLUIDA
+            self._progredir(tarefa, 1.0, "✅ Simulação concluída")
+        except PlanilhaInvalida as e:
+            tarefa.erros = list(e.erros)
+            tarefa.status = STATUS_ERRO
+        except Exception as e:
+            tarefa.erros = [f"Erro no processamento: {e}"]
+            tarefa.status = STATUS_ERRO
+        finally:
+            tarefa.concluida = datetime.datetime.now()
+            tarefa._arquivos = None
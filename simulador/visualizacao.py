@@ -0,0 +1,70 @@
+# simulador/visualizacao.py - apoio à exibição das tabelas na página
+#
+# Filtro e paginação do detalhado, para que só a página visível seja formatada
+# e enviada ao navegador, e formatação brasileira de números coluna a coluna
+# (sem .apply de uma função genérica por célula).
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from simulador.exportacao import TEXTOS_ERRO
+from simulador.motor import STATUS_OK
+
+
+def formatar_numero_br(serie):
+    """Texto no padrão brasileiro: inteiros "1.234", decimais "1.234,56" e "-" para vazios."""
+    if pd.api.types.is_integer_dtype(serie.dtype):
+        molde = "{:,}"
+        valores = serie.to_numpy(dtype=object, na_value=None).tolist()
+    else:
+        molde = "{:,.2f}"
+        valores = serie.to_numpy(dtype=float, na_value=np.nan).tolist()
+    texto = [
+        "-" if v is None or v != v else molde.format(v).replace(",", "X").replace(".", ",").replace("X", ".")
+        for v in valores
+    ]
+    return pd.Series(texto, index=serie.index, dtype=object)
+
+
+def formatar_br(df, coluna_erro="Bins_Necessarias"):
+    """Cópia para exibição: números formatados e, se houver "Status", o texto do erro em `coluna_erro`."""
+    status = df["Status"] if "Status" in df.columns else None
+    df = df.drop(columns="Status") if status is not None else df.copy()
+
+    for col in df.columns:
+        if pd.api.types.is_numeric_dtype(df[col]) and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = formatar_numero_br(df[col])
+
+    if status is not None:
+        erro = (status != STATUS_OK).to_numpy()
+        if erro.any():
+            df[coluna_erro] = df[coluna_erro].where(~erro, status.astype(object).map(TEXTOS_ERRO))
+    return df
+
+
+def opcoes_filtro(serie):
+    """Valores possíveis de uma coluna (categorias, sem varrer as linhas)."""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return list(serie.cat.categories)
+    return sorted(serie.dropna().unique())
+
+
+def filtrar_indices(df, filtros):
+    """Posições das linhas que atendem a todos os filtros {coluna: valores}; filtros vazios são ignorados."""
+    mascara = np.ones(len(df), dtype=bool)
+    for coluna, valores in filtros.items():
+        if valores:
+            mascara &= df[coluna].isin(valores).to_numpy()
+    return np.flatnonzero(mascara)
+
+
+def total_paginas(total_linhas, tamanho_pagina):
+    return max(1, math.ceil(total_linhas / tamanho_pagina))
+
+
+def pagina(df, indices, numero, tamanho_pagina):
+    """Linhas da página `numero` (1..n) dentre `indices`, formatadas para exibição."""
+    inicio = (numero - 1) * tamanho_pagina
+    return formatar_br(df.iloc[indices[inicio:inicio + tamanho_pagina]])
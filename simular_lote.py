@@ -0,0 +1,157 @@
+# simular_lote.py - simulação em lote, sem navegador
+#
+# Uso:
+#   python simular_lote.py entrada1.xlsx entrada2.xlsx pasta_com_xlsx/ --saida relatorios --workers 4
+#   python simular_lote.py base_grande.xlsx --workers 1 --particoes 8
+#
+# Cada arquivo gera <saida>/<nome>_Simulacao_Bins.xlsx com todas as abas de relatório
+# e, com --detalhado csv.gz/parquet, também o detalhado nesse formato.
+# Os arquivos são processados em paralelo num pool de processos; com --particoes o
+# cálculo de cada arquivo também é dividido por produto (workers × particoes processos).
+# O tempo de cada etapa é anexado a logs/simulacoes.jsonl (--log "" desativa).
+# As abas lidas de cada arquivo ficam em .cache/entradas (Parquet): simular de
+# novo o mesmo arquivo não relê o .xlsx (--cache-entradas "" desativa).
+# Com --cenarios cenarios.json (lista de {"nome", "volume_por_tipo",
+# "multiplicador_quantidade", "bins_por_estrutura"}) grava também
+# <saida>/<nome>_Cenarios.xlsx, comparando OK / Não Atende por Estrutura.
+# Com --encaixe-dimensoes as bins dos produtos com Comprimento/Largura/Altura na
+# base saem das unidades que cabem em cada tipo de bin, e não do volume.
+# Com --ondas todos os arquivos são ondas de uma única simulação: lidos em
+# paralelo, com o info_posicao_produtos sem repetições, geram <saida>/Ondas_Simulacao_Bins.xlsx
+# com os resumos consolidados e a aba "Resumo por Onda".
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from simulador import carregar_referencia, simular, ler_ondas, PerfilExecucao, CacheResultados, Cenario, simular_cenarios
+from simulador import exportacao
+from simulador.alocacao import PRIORIDADES, PRIORIDADE_ONDA
+from simulador.leitura import conteudo_arquivo
+from simulador.perfil import CAMINHO_LOG
+
+PASTA_CACHE_ENTRADAS = os.path.join(".cache", "entradas")
+# Nome dos relatórios de uma simulação com várias ondas
+NOME_ONDAS = "Ondas"
+
+
+def listar_arquivos(entradas):
+    arquivos = []
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            arquivos += sorted(
+                os.path.join(entrada, nome) for nome in os.listdir(entrada)
+                if nome.lower().endswith(".xlsx") and not nome.startswith("~$")
+            )
+        else:
+            arquivos.append(entrada)
+    return arquivos
+
+
+def ler_cenarios(caminho):
+    """Cenários de um arquivo JSON (lista de objetos com os campos de Cenario)."""
+    with open(caminho, encoding="utf-8") as f:
+        return [Cenario(**c) for c in json.load(f)]
+
+
+def processar_arquivo(caminho, pasta_saida, particoes=1, formatos_detalhado=(), caminho_log=CAMINHO_LOG, pasta_cache_entradas=PASTA_CACHE_ENTRADAS, cenarios=None, prioridade=PRIORIDADE_ONDA, encaixe_dimensoes=False, workers_leitura=None):
+    """Simula um arquivo e grava o relatório; roda dentro de um processo do pool.
+
+    Com uma lista de caminhos, os arquivos são ondas de uma única simulação (lidos em
+    até `workers_leitura` processos) e os relatórios se chamam "Ondas_...".
+    """
+    inicio = time.time()
+    perfil = PerfilExecucao()
+    caminhos = [caminho] if isinstance(caminho, str) else list(caminho)
+    # Só o disco interessa aqui: cada arquivo é lido uma vez por processo
+    cache = CacheResultados(limite_bytes=0, pasta=pasta_cache_entradas) if pasta_cache_entradas else None
+    with perfil.etapa("Leitura do Excel") as etapa:
+        arquivos = [(os.path.basename(c), conteudo_arquivo(c)) for c in caminhos]
+        df_base, df_posicoes_prod = ler_ondas(arquivos, workers=workers_leitura, cache=cache)
+        etapa["linhas"] = len(df_base)
+    # Em cada processo as referências são lidas uma vez e ficam no cache do processo
+    resultado = simular(df_base, df_posicoes_prod, carregar_referencia(), workers=particoes, perfil=perfil, prioridade=prioridade, encaixe_dimensoes=encaixe_dimensoes)
+
+    nome = os.path.splitext(os.path.basename(caminhos[0]))[0] if len(caminhos) == 1 else NOME_ONDAS
+    destino = os.path.join(pasta_saida, f"{nome}_Simulacao_Bins.xlsx")
+    with perfil.etapa("Exportação Excel", len(resultado["tabelas"]["df_resultado"])):
+        exportacao.gravar_excel(destino, exportacao.abas_relatorio(resultado))
+
+    for formato in formatos_detalhado:
+        gerar = exportacao.csv_gz if formato == "csv.gz" else exportacao.parquet
+        with perfil.etapa(f"Exportação {formato}", len(resultado["tabelas"]["df_resultado"])):
+            with open(os.path.join(pasta_saida, f"{nome}_Simulacao_Bins.{formato}"), "wb") as f:
+                f.write(gerar(resultado["tabelas"]["df_resultado"]))
+
+    if cenarios:
+        with perfil.etapa("Cenários", len(df_base)):
+            comparacao = simular_cenarios(df_base, df_posicoes_prod, cenarios, carregar_referencia())
+            exportacao.gravar_excel(os.path.join(pasta_saida, f"{nome}_Cenarios.xlsx"), [("Cenários", comparacao)])
+
+    indicadores = resultado["indicadores"]
+    if caminho_log:
+        perfil.registrar(caminho_log, origem="lote", arquivo=", ".join(nome for nome, _ in arquivos), linhas_base=indicadores["total_linhas_base"], workers=particoes)
+    return destino, indicadores["total_linhas_base"], indicadores["contador_sucesso"], time.time() - inicio
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulador de Bins - processamento em lote de arquivos .xlsx")
+    parser.add_argument("entradas", nargs="+", help="Arquivos .xlsx ou pastas com arquivos .xlsx")
+    parser.add_argument("--saida", default="relatorios", help="Pasta de saída dos relatórios (padrão: relatorios)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Quantidade de arquivos processados em paralelo")
+    parser.add_argument("--detalhado", action="append", choices=["csv.gz", "parquet"], default=[], help="Grava também o detalhado neste formato (pode repetir)")
+    parser.add_argument("--particoes", type=int, default=1, help="Processos por arquivo no cálculo particionado por produto")
+    parser.add_argument("--log", default=CAMINHO_LOG, help=f"Log JSONL com o tempo de cada etapa (padrão: {CAMINHO_LOG}; vazio desativa)")
+    parser.add_argument("--cache-entradas", default=PASTA_CACHE_ENTRADAS, help=f"Pasta do cache das abas lidas (padrão: {PASTA_CACHE_ENTRADAS}; vazio desativa)")
+    parser.add_argument("--prioridade", default=PRIORIDADE_ONDA, choices=PRIORIDADES, help="Ordem de alocação das bins de cada posição entre as linhas")
+    parser.add_argument("--encaixe-dimensoes", action="store_true", help="Calcula as bins pelas dimensões do item (colunas Comprimento, Largura, Altura e UM dimensão da base)")
+    parser.add_argument("--ondas", action="store_true", help="Simula todos os arquivos juntos, cada um como uma onda (resumos por onda e consolidados)")
+    parser.add_argument("--cenarios", help="Arquivo JSON com cenários what-if a comparar em cada arquivo")
+    args = parser.parse_args(argv)
+
+    arquivos = listar_arquivos(args.entradas)
+    if not arquivos:
+        print("⚠️ Nenhum arquivo .xlsx encontrado.")
+        return 1
+
+    cenarios = ler_cenarios(args.cenarios) if args.cenarios else None
+    os.makedirs(args.saida, exist_ok=True)
+
+    # Atualiza o banco uma única vez antes de abrir o pool (os processos apenas leem)
+    carregar_referencia()
+
+    if args.ondas:
+        # Uma única simulação: os --workers processos leem os arquivos em paralelo
+        try:
+            destino, total, sucesso, tempo = processar_arquivo(
+                arquivos, args.saida, args.particoes, args.detalhado, args.log, args.cache_entradas, cenarios,
+                args.prioridade, args.encaixe_dimensoes, workers_leitura=args.workers
+            )
+        except Exception as e:
+            print(f"❌ Erro ao processar as ondas: {e}")
+            return 1
+        print(f"✅ {len(arquivos)} ondas: {total} linhas, {sucesso} sem erro, {tempo:.1f}s -> {destino}")
+        return 0
+
+    falhas = 0
+    workers = max(1, min(args.workers or 1, len(arquivos)))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        tarefas = {pool.submit(processar_arquivo, caminho, args.saida, args.particoes, args.detalhado, args.log, args.cache_entradas, cenarios, args.prioridade, args.encaixe_dimensoes): caminho for caminho in arquivos}
+        for tarefa in as_completed(tarefas):
+            caminho = tarefas[tarefa]
+            try:
+                destino, total, sucesso, tempo = tarefa.result()
+                print(f"✅ {caminho}: {total} linhas, {sucesso} sem erro, {tempo:.1f}s -> {destino}")
+            except Exception as e:
+                falhas += 1
+                print(f"❌ Erro ao processar {caminho}: {e}")
+
+    print(f"✅ {len(arquivos) - falhas} de {len(arquivos)} arquivos simulados.")
+    return 1 if falhas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,25 @@
+# tests/conftest.py - referências e entradas sintéticas compartilhadas pelos testes
+#
+# O banco de referência é sincronizado a partir dos CSVs do repositório numa pasta
+# temporária, sem alterar o logistica.db versionado.
+
+import os
+
+import pytest
+
+from simulador.dados_sinteticos import gerar_entrada
+from simulador.referencia import carregar_referencia, PASTA_CSV
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASTA_CSV_REPOSITORIO = os.path.join(RAIZ, PASTA_CSV)
+
+
+@pytest.fixture(scope="session")
+def referencia(tmp_path_factory):
+    return carregar_referencia(str(tmp_path_factory.mktemp("referencia") / "logistica.db"), PASTA_CSV_REPOSITORIO)
+
+
+@pytest.fixture(scope="session")
+def entrada():
+    """(df_base, df_posicoes_prod) brutos, como lidos do arquivo."""
+    return gerar_entrada(3000, semente=1, pasta_csv=PASTA_CSV_REPOSITORIO)
@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from simulador.alocacao import COLUNAS_ALOCACAO, PRIORIDADES, PRIORIDADE_LOJA, PRIORIDADE_QUANTIDADE
+from simulador.motor import STATUS_OK
+from simulador.simulacao import simular
+
+
+def alocacao_pandas(df_resultado, prioridade):
+    """Consumo acumulado e bins excedentes das linhas OK por groupby().cumsum(), como referência."""
+    df = df_resultado[df_resultado["Status"] == STATUS_OK].astype({"Posicao": str, "Estrutura": str, "Recebedor": str})
+    chaves = {PRIORIDADE_LOJA: df["Recebedor"], PRIORIDADE_QUANTIDADE: -df["Bins_Necessarias"]}
+    df = df.assign(_linha=np.flatnonzero(df_resultado["Status"] == STATUS_OK), _chave=chaves.get(prioridade, 0))
+    df = df.sort_values(["Posicao", "Estrutura", "_chave", "_linha"])
+    consumo = df.groupby(["Posicao", "Estrutura"])["Bins_Necessarias"].cumsum()
+    excedentes = (consumo - df["Bins_Disponiveis"]).clip(lower=0, upper=df["Bins_Necessarias"])
+    return pd.DataFrame({"Consumo_Acumulado": consumo, "Bins_Excedentes": excedentes}).sort_index()
+
+
+@pytest.mark.parametrize("prioridade", PRIORIDADES)
+def test_alocacao_igual_ao_cumsum_por_posicao(entrada, referencia, prioridade):
+    df_base, df_posicoes_prod = entrada
+    df_resultado = simular(df_base, df_posicoes_prod, referencia, prioridade=prioridade)["tabelas"]["df_resultado"]
+
+    esperado = alocacao_pandas(df_resultado, prioridade)
+    obtido = df_resultado.loc[esperado.index, COLUNAS_ALOCACAO]
+    pd.testing.assert_frame_equal(obtido, esperado, check_dtype=False)
+    assert (obtido["Bins_Excedentes"] > 0).any()  # há posições com mais demanda que bins
+    assert df_resultado.loc[df_resultado["Status"] != STATUS_OK, "Bins_Excedentes"].isna().all()
@@ -0,0 +1,35 @@
+import os
+import threading
+
+import pandas as pd
+
+from simulador.cache_resultados import CacheResultados
+
+
+def _resultado(valor, linhas=20_000):
+    tabelas = {nome: pd.DataFrame({"valor": [valor] * linhas}) for nome in ("df_resultado", "resumo_geral", "resumo_ok")}
+    return {"tabelas": tabelas, "indicadores": {"valor": valor}}
+
+
+def test_gravacoes_simultaneas_da_mesma_chave(tmp_path):
+    cache = CacheResultados(limite_bytes=0, pasta=str(tmp_path))
+    barreira = threading.Barrier(2)
+
+    def guardar(valor):
+        for _ in range(5):
+            barreira.wait()
+            cache.guardar("ultima", _resultado(valor))
+
+    threads = [threading.Thread(target=guardar, args=(valor,)) for valor in (1, 2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # Lido de novo do disco, o item é inteiro de uma das gravações, sem pastas temporárias
+    lido = CacheResultados(limite_bytes=0, pasta=str(tmp_path)).obter("ultima")
+    valor = lido["indicadores"]["valor"]
+    assert valor in (1, 2)
+    for df in lido["tabelas"].values():
+        assert (df["valor"] == valor).all()
+    assert os.listdir(tmp_path) == ["ultima"]
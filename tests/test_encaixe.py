@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+from simulador.encaixe import dimensoes_produto, tabela_encaixe, unidades_por_bin
+from simulador.incremental import simular_incremental
+from simulador.motor import STATUS_OK, STATUS_NAO_CABE
+from simulador.simulacao import simular
+
+
+def test_unidades_por_bin_usa_a_melhor_orientacao():
+    # 30×20×10 numa bin 70×25×21: deitado (30 no comprimento, 10 na largura) cabem 2·2·1
+    assert unidades_por_bin([[10, 20, 30]], [[70, 25, 21]]).tolist() == [[4]]
+    assert unidades_por_bin([[120, 5, 5]], [[70, 25, 21]]).tolist() == [[0]]
+
+
+def test_base_sem_dimensoes_segue_pelo_volume(entrada, referencia):
+    df_base, df_posicoes_prod = entrada
+    tabela = tabela_encaixe(dimensoes_produto(df_base), referencia.df_tipo_bin)
+    assert np.isnan(tabela.consultar(df_base["Produto"], np.full(len(df_base), "Flowrack", dtype=object))).all()
+
+    por_volume = simular(df_base, df_posicoes_prod, referencia)
+    por_encaixe = simular(df_base, df_posicoes_prod, referencia, encaixe_dimensoes=True)
+    incremental, _ = simular_incremental(df_base, df_posicoes_prod, None, referencia, encaixe_dimensoes=True)
+    for nome, tabela in por_volume["tabelas"].items():
+        pd.testing.assert_frame_equal(por_encaixe["tabelas"][nome], tabela)
+        pd.testing.assert_frame_equal(incremental["tabelas"][nome], tabela, check_dtype=False, check_categorical=False)
+
+
+def test_encaixe_muda_as_bins_e_marca_itens_que_nao_cabem(entrada, referencia):
+    df_base, df_posicoes_prod = entrada
+    # Dimensões de 5 a 25 cm por produto; o primeiro produto, com 2 m de comprimento, não cabe em bin nenhuma
+    rng = np.random.default_rng(2)
+    produtos = df_base["Produto"].unique()
+    medidas = pd.DataFrame(rng.uniform(5, 25, (len(produtos), 3)).round(1), index=produtos, columns=["Comprimento", "Largura", "Altura"])
+    grande = df_base["Produto"].iloc[0]
+    medidas.loc[grande, "Comprimento"] = 200
+    df_base = df_base.join(medidas, on="Produto")
+
+    por_volume = simular(df_base, df_posicoes_prod, referencia)["tabelas"]["df_resultado"]
+    por_encaixe = simular(df_base, df_posicoes_prod, referencia, encaixe_dimensoes=True)["tabelas"]["df_resultado"]
+
+    do_grande = (por_encaixe["Produto"] == grande).to_numpy() & (por_volume["Status"] == STATUS_OK).to_numpy()
+    assert do_grande.any()
+    assert (por_encaixe.loc[do_grande, "Status"] == STATUS_NAO_CABE).all()
+    assert por_encaixe.loc[do_grande, "Bins_Necessarias"].isna().all()
+
+    ok = (por_encaixe["Status"] == STATUS_OK).to_numpy()
+    assert (por_encaixe.loc[ok, "Bins_Necessarias"] != por_volume.loc[ok, "Bins_Necessarias"]).any()
+
+    # Bins da linha = quantidade / unidades que cabem na bin, arredondado para cima
+    tabela = tabela_encaixe(dimensoes_produto(df_base), referencia.df_tipo_bin)
+    unidades = tabela.consultar(por_encaixe["Produto"][ok], por_encaixe["Tipo_Bin"][ok])
+    esperado = np.ceil(por_encaixe.loc[ok, "Quantidade_Total"].to_numpy(dtype=float) / unidades)
+    np.testing.assert_array_equal(por_encaixe.loc[ok, "Bins_Necessarias"].to_numpy(dtype=float), esperado)
@@ -0,0 +1,67 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from simulador.incremental import simular_incremental
+from simulador.referencia import carregar_referencia
+from simulador.simulacao import simular
+
+from conftest import PASTA_CSV_REPOSITORIO
+
+
+def comparar(completo, incremental):
+    for nome, tabela in completo["tabelas"].items():
+        pd.testing.assert_frame_equal(incremental["tabelas"][nome], tabela, check_dtype=False, check_categorical=False)
+    for indicador in ("contador_sucesso", "total_linhas_base"):
+        assert incremental["indicadores"][indicador] == completo["indicadores"][indicador]
+
+
+def editar(df_base, df_posicoes_prod, semente=1):
+    """Quantidades alteradas, linhas removidas e novas, ordem embaralhada e posições trocadas."""
+    rng = np.random.default_rng(semente)
+    df_base = df_base.copy()
+    linhas = rng.choice(len(df_base), len(df_base) // 50, replace=False)
+    df_base.loc[linhas, "Qtd.solicitada total"] = pd.to_numeric(df_base.loc[linhas, "Qtd.solicitada total"]) * 3
+    df_base = df_base.drop(rng.choice(len(df_base), len(df_base) // 100, replace=False))
+    novas = df_base.sample(len(df_base) // 100, random_state=semente).assign(**{"Recebedor mercadoria": 99999})
+    df_base = pd.concat([df_base, novas], ignore_index=True).sample(frac=1, random_state=semente, ignore_index=True)
+
+    df_posicoes_prod = df_posicoes_prod.copy()
+    trocados = df_posicoes_prod["Produto"].isin(df_posicoes_prod["Produto"].dropna().unique()[:30])
+    df_posicoes_prod.loc[trocados, "Posição no depósito"] = df_posicoes_prod.loc[trocados, "Posição no depósito"][::-1].to_numpy()
+    return df_base, df_posicoes_prod
+
+
+@pytest.fixture(scope="module")
+def referencia_alterada(tmp_path_factory):
+    """Referência com o volume da Estanteria reduzido para 12 L."""
+    pasta = tmp_path_factory.mktemp("csv_alterado")
+    shutil.copy(os.path.join(PASTA_CSV_REPOSITORIO, "info_posicao_bin.csv"), pasta)
+    with open(os.path.join(PASTA_CSV_REPOSITORIO, "info_tipo_bin.csv"), "rb") as f:
+        tipos = f.read().replace(b"Estanteria;41;30;18;30.00", b"Estanteria;41;30;18;12.00")
+    (pasta / "info_tipo_bin.csv").write_bytes(tipos)
+    return carregar_referencia(str(pasta / "logistica.db"), str(pasta))
+
+
+@pytest.mark.parametrize("encaixe_dimensoes", [False, True])
+def test_incremental_igual_a_simulacao_completa(entrada, referencia, referencia_alterada, encaixe_dimensoes):
+    df_base, df_posicoes_prod = entrada
+    _, estado = simular_incremental(df_base, df_posicoes_prod, None, referencia, encaixe_dimensoes=encaixe_dimensoes)
+
+    # Base editada sobre o estado da primeira execução
+    base_editada, posicoes_editadas = editar(df_base, df_posicoes_prod)
+    resultado, estado_editado = simular_incremental(base_editada, posicoes_editadas, estado, referencia, encaixe_dimensoes=encaixe_dimensoes)
+    comparar(simular(base_editada, posicoes_editadas, referencia, encaixe_dimensoes=encaixe_dimensoes), resultado)
+    assert resultado["indicadores"]["linhas_recalculadas"] < len(base_editada)
+
+    # De volta à base original, encadeando os estados
+    resultado, _ = simular_incremental(df_base, df_posicoes_prod, estado_editado, referencia, encaixe_dimensoes=encaixe_dimensoes)
+    comparar(simular(df_base, df_posicoes_prod, referencia, encaixe_dimensoes=encaixe_dimensoes), resultado)
+
+    # Referência alterada com o estado da referência anterior
+    resultado, _ = simular_incremental(df_base, df_posicoes_prod, estado, referencia_alterada, encaixe_dimensoes=encaixe_dimensoes)
+    comparar(simular(df_base, df_posicoes_prod, referencia_alterada, encaixe_dimensoes=encaixe_dimensoes), resultado)
+    assert resultado["indicadores"]["linhas_recalculadas"] > 0
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+
+from simulador.exportacao import renderizar
+from simulador.motor import arredondar, calcular_bins
+from simulador.simulacao import preparar_base, preparar_posicoes
+
+
+def calcular_bins_laco(df_base, df_posicoes_prod):
+    """Cálculo linha a linha (iterrows) da versão original da página, como referência."""
+    resultado = []
+    for _, row in df_base.iterrows():
+        produto = row["Produto"]
+        estrutura = row["Tipo_de_depósito"]
+        loja = row["Recebedor mercadoria"]
+        volume_unitario = row["Volume unitário (L)"]
+        qtd = row["Qtd.solicitada total"]
+
+        posicoes = df_posicoes_prod[(df_posicoes_prod["Produto"] == produto) & (df_posicoes_prod["Tipo_de_depósito"] == estrutura)]
+        if posicoes.empty:
+            resultado.append({
+                "Produto": produto, "Recebedor": loja, "Estrutura": estrutura,
+                "Posicao": "N/A", "Tipo_Bin": "N/A",
+                "Bins_Necessarias": "Erro: Produto sem posição",
+                "Bins_Disponiveis": "-", "Diferença": "-",
+                "Quantidade_Total": "-", "Volume_Total": "-", "Volumetria_Máxima": "-"
+            })
+            continue
+
+        volume_total = volume_unitario * qtd
+        for _, pos in posicoes.iterrows():
+            volume_max = pos.get("Volume_max_L", 1)
+            if pd.isna(volume_max) or volume_max <= 0:
+                resultado.append({
+                    "Produto": produto, "Recebedor": loja, "Estrutura": estrutura,
+                    "Posicao": pos.get("Posicao", "N/A"), "Tipo_Bin": pos.get("Tipo", "N/A"),
+                    "Bins_Necessarias": "Erro: Bin sem volume",
+                    "Bins_Disponiveis": pos.get("Quantidade_Bin", 0), "Diferença": "-",
+                    "Quantidade_Total": "-", "Volume_Total": "-", "Volumetria_Máxima": "-"
+                })
+                continue
+
+            bins_necessarias = int(-(-volume_total // volume_max))
+            bins_disponiveis = int(pos.get("Quantidade_Bin", 0))
+            quantidade_total = min(bins_necessarias * qtd, qtd)
+            resultado.append({
+                "Produto": produto, "Recebedor": loja, "Estrutura": estrutura,
+                "Posicao": pos.get("Posicao", "N/A"), "Tipo_Bin": pos.get("Tipo", "N/A"),
+                "Bins_Necessarias": bins_necessarias,
+                "Bins_Disponiveis": bins_disponiveis,
+                "Diferença": bins_disponiveis - bins_necessarias,
+                "Quantidade_Total": quantidade_total,
+                "Volume_Total": round(quantidade_total * volume_unitario, 2),
+                "Volumetria_Máxima": round(bins_disponiveis * volume_max, 2)
+            })
+    return pd.DataFrame(resultado)
+
+
+def _valor(v):
+    # Números como float (inteiros do laço e Int64 do motor); ausente é "-" como na exibição
+    if isinstance(v, (int, float, np.number)):
+        return "-" if pd.isna(v) else float(v)
+    return str(v)
+
+
+def _valores(df):
+    return df.apply(lambda col: [_valor(v) for v in col])
+
+
+def test_arredondar_como_round_do_python():
+    valores = np.array([2.215, 3.145, 0.805, 2.675, -2.215, 1.0049999, 12.5, np.nan])
+    esperado = [round(v, 2) for v in valores.tolist()]
+    np.testing.assert_array_equal(arredondar(valores), esperado)
+
+
+def test_motor_igual_ao_laco_original(entrada, referencia):
+    df_base, df_posicoes_prod = entrada
+    df_base = preparar_base(df_base.head(800))
+    df_posicoes_prod = preparar_posicoes(df_posicoes_prod, referencia)
+
+    esperado = calcular_bins_laco(df_base, df_posicoes_prod)
+    df_resultado, contador_sucesso = calcular_bins(df_base, df_posicoes_prod)
+    obtido = renderizar(df_resultado)[esperado.columns]
+
+    pd.testing.assert_frame_equal(_valores(obtido), _valores(esperado))
+    assert contador_sucesso == int(pd.to_numeric(esperado["Bins_Necessarias"], errors="coerce").notna().sum())
@@ -0,0 +1,14 @@
+import pandas as pd
+
+from simulador.simulacao import simular
+
+
+def test_particionado_igual_ao_processo_unico(entrada, referencia):
+    df_base, df_posicoes_prod = entrada
+    unico = simular(df_base, df_posicoes_prod, referencia, workers=1)
+    particionado = simular(df_base, df_posicoes_prod, referencia, workers=2)
+
+    assert particionado["tabelas"].keys() == unico["tabelas"].keys()
+    for nome, tabela in unico["tabelas"].items():
+        pd.testing.assert_frame_equal(particionado["tabelas"][nome], tabela)
+    assert particionado["indicadores"]["contador_sucesso"] == unico["indicadores"]["contador_sucesso"]